@@ -5,6 +5,167 @@ Implements overtaking logic, racing line optimization, DRS, and slipstream effec
 
 import numpy as np
 import math
+from typing import NamedTuple, Optional
+
+from numba_compat import njit
+
+
+# Integer tyre compound codes for the batched (array) strategy helpers
+TYRE_SOFT, TYRE_MEDIUM, TYRE_HARD, TYRE_WET = 0, 1, 2, 3
+TYRE_NAMES = ('SOFT', 'MEDIUM', 'HARD', 'WET')
+TYRE_CODES = {name: code for code, name in enumerate(TYRE_NAMES)}
+
+
+class CarAheadInfo(NamedTuple):
+    """Nearest car ahead within the overtaking time window"""
+    car: object
+    distance: float
+    time_gap: float
+
+
+class GapInfo(NamedTuple):
+    """Overtaking gap found in the front LiDAR sector"""
+    can_overtake: bool
+    side: Optional[str] = None  # 'left' or 'right'
+    gap_size: int = 0
+    gap_center: int = 0
+
+
+class OvertakingManeuver(NamedTuple):
+    """Control adjustments for an overtaking move"""
+    steering_adjustment: float = 0.0
+    throttle_boost: float = 0.0
+    target_line_offset: float = 0.0
+    overtaking: bool = False
+
+
+NO_GAP = GapInfo(False)
+NO_MANEUVER = OvertakingManeuver()
+
+
+class RaceInteractions(NamedTuple):
+    """Per-tick car-ahead, DRS and slipstream result for one car"""
+    car_ahead: Optional[CarAheadInfo]
+    drs_ok: bool
+    slipstream_boost: float
+
+
+# Side codes returned by _lidar_decision
+GAP_NONE, GAP_LEFT, GAP_RIGHT = 0, 1, 2
+_GAP_SIDE_NAMES = (None, 'left', 'right')
+
+
+@njit(cache=True, fastmath=True)
+def _lidar_decision(lidar, obstacle_thr, gap_thr):
+    """
+    Single-pass scan of the front LiDAR sector (middle half of the sweep).
+    
+    Tracks the front minimum, the largest gap over the whole front sector
+    and the largest gap in each of its left/right halves, where a gap is a
+    run of consecutive readings above gap_thr.
+    
+    Args:
+        lidar: 1D float array of distances
+        obstacle_thr: Front distance below which FollowGap is required
+        gap_thr: Minimum distance for a ray to count as free space
+    
+    Returns:
+        (use_follow_gap, side, start, end, size) where side is GAP_NONE,
+        GAP_LEFT or GAP_RIGHT and start/end index into that half-sector
+    """
+    n = lidar.shape[0]
+    front_start = n // 4
+    n_front = 3 * n // 4 - front_start
+    mid = n_front // 2
+    
+    front_min = np.inf
+    full_best = 0
+    full_run = -1
+    left_start = left_end = left_size = 0
+    right_start = right_end = right_size = 0
+    run = -1  # open run start, relative to the current half-sector
+    
+    for k in range(n_front):
+        d = lidar[front_start + k]
+        if d < front_min:
+            front_min = d
+        
+        # Crossing into the right half closes any open left run
+        if k == mid and run >= 0:
+            if mid - run > left_size:
+                left_start, left_end, left_size = run, mid, mid - run
+            run = -1
+        j = k if k < mid else k - mid
+        
+        if d > gap_thr:
+            if run < 0:
+                run = j
+            if full_run < 0:
+                full_run = k
+        else:
+            if run >= 0:
+                if k < mid:
+                    if j - run > left_size:
+                        left_start, left_end, left_size = run, j, j - run
+                elif j - run > right_size:
+                    right_start, right_end, right_size = run, j, j - run
+                run = -1
+            if full_run >= 0:
+                if k - full_run > full_best:
+                    full_best = k - full_run
+                full_run = -1
+    
+    # Gaps still open at the end of the sector
+    n_right = n_front - mid
+    if run >= 0 and n_right - run > right_size:
+        right_start, right_end, right_size = run, n_right, n_right - run
+    if full_run >= 0 and n_front - full_run > full_best:
+        full_best = n_front - full_run
+    
+    use_follow_gap = front_min < obstacle_thr or full_best > n_front * 0.3
+    
+    # Better side wins; ties go right
+    if left_size > 0 and left_size > right_size:
+        return use_follow_gap, GAP_LEFT, left_start, left_end, left_size
+    if right_size > 0:
+        return use_follow_gap, GAP_RIGHT, right_start, right_end, right_size
+    return use_follow_gap, GAP_NONE, 0, 0, 0
+
+
+def _lut_index(track_spline, s):
+    """
+    Nearest centerline LUT index for arc length(s) s.
+    
+    Args:
+        track_spline: Track spline dict with 'curv_lut' and 'ds'
+        s: Arc length (scalar or array)
+    
+    Returns:
+        Integer index (or index array) into the '*_lut' tables
+    """
+    n_lut = len(track_spline['curv_lut'])
+    return np.mod(np.rint(np.asarray(s) / track_spline['ds']), n_lut).astype(np.int64)
+
+
+def _line_offset_vec(curvature, speed, slow_factor=-0.25, medium_factor=-0.15, fast_factor=0.10):
+    """
+    Branchless racing line offset from centerline.
+    
+    Args:
+        curvature: Track curvature (scalar or array)
+        speed: Current speed (scalar or array, broadcast against curvature)
+        slow_factor: Radius fraction for slow corners (< 30 m/s)
+        medium_factor: Radius fraction for medium corners (30-60 m/s)
+        fast_factor: Radius fraction for fast corners (> 60 m/s)
+    
+    Returns:
+        Offset in meters (positive = outside, negative = inside)
+    """
+    abs_curvature = np.abs(curvature)
+    straight = abs_curvature < 1e-6  # Straight: use centerline
+    radius = 1.0 / np.maximum(abs_curvature, 1e-12)
+    factor = np.where(speed < 30, slow_factor, np.where(speed < 60, medium_factor, fast_factor))
+    return np.where(straight, 0.0, radius * factor)
 
 
 class AdvancedDriving:
@@ -20,6 +181,7 @@ class AdvancedDriving:
         self.drs_activation_distance = 1.0  # seconds behind car ahead
         self.drs_drag_reduction = 0.15  # 15% drag reduction
         self.drs_min_speed = 50.0  # km/h minimum speed for DRS
+        self.drs_min_ms = self.drs_min_speed / 3.6  # same threshold in m/s
         
         # Slipstream parameters
         self.slipstream_distance = 0.5  # seconds behind
@@ -28,8 +190,16 @@ class AdvancedDriving:
         
         # Racing line parameters
         self.racing_line_lookahead = 3.0  # seconds ahead
+        self.racing_line_samples = 10
+        self._waypoints_buf = np.empty((self.racing_line_samples, 2))  # reused by calculate_racing_line
+        # Sample positions as fractions of the lookahead: (i + 1) / n_samples
+        self._racing_line_fracs = np.arange(1, self.racing_line_samples + 1) / self.racing_line_samples
+        
+        # Unit conversions precomputed for the per-tick hot paths
+        self._inv_slipstream_distance = 1.0 / self.slipstream_distance
     
-    def detect_car_ahead(self, car, all_cars, track_spline, track_length):
+    def detect_car_ahead(self, car, all_cars, track_spline, track_length,
+                         cars_s=None, cars_on_pit=None):
         """
         Detect if there's a car ahead within threshold distance.
         
@@ -38,136 +208,97 @@ class AdvancedDriving:
             all_cars: List of all cars
             track_spline: Track spline dict
             track_length: Total track length
+            cars_s: Array of track positions for all_cars (optional, built if None)
+            cars_on_pit: Boolean array of pit status for all_cars (optional, built if None)
         
         Returns:
-            Car ahead dict with 'car', 'distance', 'time_gap', or None
+            CarAheadInfo with 'car', 'distance', 'time_gap', or None
         """
-        car_ahead = None
-        min_distance = float('inf')
-        min_time_gap = float('inf')
-        
-        for other in all_cars:
-            if other is car or other.on_pit:
-                continue
-            
-            # Calculate distance along track
-            distance_along_track = (other.s - car.s) % track_length
-            
-            # If distance is very small, car might be behind
-            if distance_along_track < 0.1:
-                distance_along_track = track_length - distance_along_track
-            
-            # Check if car is ahead
-            if 0.1 < distance_along_track < track_length / 2:
-                # Calculate time gap
-                if car.v > 0.1:
-                    time_gap = distance_along_track / car.v
-                else:
-                    time_gap = float('inf')
-                
-                # Check if within threshold
-                if time_gap < self.overtaking_distance_threshold:
-                    if time_gap < min_time_gap:
-                        min_time_gap = time_gap
-                        min_distance = distance_along_track
-                        car_ahead = other
-        
-        if car_ahead:
-            return {
-                'car': car_ahead,
-                'distance': min_distance,
-                'time_gap': min_time_gap
-            }
+        v = car.v
+        car_s = car.s
+        
+        # Stationary cars never close on anyone, so every time gap is infinite
+        if v <= 0.1 or len(all_cars) == 0:
+            return None
+        
+        if cars_s is None:
+            cars_s = np.array([c.s for c in all_cars], dtype=float)
+        if cars_on_pit is None:
+            cars_on_pit = np.array([c.on_pit for c in all_cars], dtype=bool)
+        
+        # Distance along track to every car; the car itself sits at 0 and is masked out
+        distance_along_track = np.mod(cars_s - car_s, track_length)
+        ahead = (~cars_on_pit) & (distance_along_track > 0.1) & (distance_along_track < track_length / 2)
+        
+        time_gap = np.where(ahead, distance_along_track, np.inf) / v
+        idx = int(np.argmin(time_gap))
+        min_time_gap = float(time_gap[idx])
+        
+        # Check if within threshold
+        if min_time_gap < self.overtaking_distance_threshold:
+            return CarAheadInfo(all_cars[idx], float(distance_along_track[idx]), min_time_gap)
         
         return None
     
+    def update_race_interactions(self, car, all_cars, track_spline, track_length,
+                                 cars_s=None, cars_on_pit=None):
+        """
+        Detect the car ahead and derive DRS eligibility and slipstream boost
+        from it in a single pass (fused detect_car_ahead,
+        check_drs_eligibility and calculate_slipstream_effect).
+        
+        Args:
+            car: Current car
+            all_cars: List of all cars
+            track_spline: Track spline dict
+            track_length: Total track length
+            cars_s: Array of track positions for all_cars (optional)
+            cars_on_pit: Boolean array of pit status for all_cars (optional)
+        
+        Returns:
+            RaceInteractions with 'car_ahead', 'drs_ok', 'slipstream_boost'
+        """
+        car_ahead = self.detect_car_ahead(car, all_cars, track_spline, track_length,
+                                          cars_s, cars_on_pit)
+        if car_ahead is None:
+            return RaceInteractions(None, False, 1.0)
+        
+        time_gap = car_ahead.time_gap
+        
+        # DRS: fast enough, close enough, and on a straight (low curvature)
+        drs_ok = (car.v >= self.drs_min_ms
+                  and time_gap <= self.drs_activation_distance
+                  and abs(track_spline['curv_lut'][_lut_index(track_spline, car.s)]) <= 0.005)
+        
+        # Slipstream boost fades linearly to zero at slipstream_distance
+        boost = 1.0 + self.slipstream_boost_max * max(0.0, 1 - time_gap * self._inv_slipstream_distance)
+        
+        return RaceInteractions(car_ahead, bool(drs_ok), boost)
+    
     def check_overtaking_gap(self, car, car_ahead, lidar_data, track_spline):
         """
         Check if there's a gap suitable for overtaking.
         
         Args:
             car: Current car
-            car_ahead: Car ahead dict
+            car_ahead: CarAheadInfo for the car ahead
             lidar_data: LiDAR scan
             track_spline: Track spline dict
         
         Returns:
-            Dict with 'can_overtake', 'side' ('left' or 'right'), 'gap_size'
+            GapInfo with 'can_overtake', 'side' ('left' or 'right'), 'gap_size', 'gap_center'
         """
         if len(lidar_data) == 0:
-            return {'can_overtake': False}
+            return NO_GAP
         
-        # Focus on front-left and front-right sectors
-        n_rays = len(lidar_data)
-        front_start = n_rays // 4
-        front_end = 3 * n_rays // 4
-        front_lidar = lidar_data[front_start:front_end]
-        
-        # Split into left and right
-        mid = len(front_lidar) // 2
-        left_lidar = front_lidar[:mid]
-        right_lidar = front_lidar[mid:]
-        
-        # Find gaps in each side
-        def find_largest_gap(sector_lidar):
-            gaps = []
-            in_gap = False
-            gap_start = None
-            
-            for i, dist in enumerate(sector_lidar):
-                if dist > self.overtaking_gap_threshold:
-                    if not in_gap:
-                        gap_start = i
-                        in_gap = True
-                else:
-                    if in_gap:
-                        gap_size = i - gap_start
-                        gaps.append({'start': gap_start, 'end': i, 'size': gap_size})
-                        in_gap = False
-            
-            if in_gap:
-                gap_size = len(sector_lidar) - gap_start
-                gaps.append({'start': gap_start, 'end': len(sector_lidar), 'size': gap_size})
-            
-            if gaps:
-                return max(gaps, key=lambda g: g['size'])
-            return None
+        # Largest gap in the front-left and front-right sectors
+        _, side, start, end, size = _lidar_decision(
+            np.asarray(lidar_data, dtype=np.float64), 0.0, self.overtaking_gap_threshold
+        )
+        if side == GAP_NONE:
+            return NO_GAP
         
-        left_gap = find_largest_gap(left_lidar)
-        right_gap = find_largest_gap(right_lidar)
-        
-        # Determine which side has better gap
-        if left_gap and right_gap:
-            if left_gap['size'] > right_gap['size']:
-                return {
-                    'can_overtake': True,
-                    'side': 'left',
-                    'gap_size': left_gap['size'],
-                    'gap_center': (left_gap['start'] + left_gap['end']) // 2
-                }
-            else:
-                return {
-                    'can_overtake': True,
-                    'side': 'right',
-                    'gap_size': right_gap['size'],
-                    'gap_center': (right_gap['start'] + right_gap['end']) // 2
-                }
-        elif left_gap:
-            return {
-                'can_overtake': True,
-                'side': 'left',
-                'gap_size': left_gap['size'],
-                'gap_center': (left_gap['start'] + left_gap['end']) // 2
-            }
-        elif right_gap:
-            return {
-                'can_overtake': True,
-                'side': 'right',
-                'gap_size': right_gap['size'],
-                'gap_center': (right_gap['start'] + right_gap['end']) // 2
-            }
-        
-        return {'can_overtake': False}
+        return GapInfo(True, _GAP_SIDE_NAMES[side], size, (start + end) // 2)
     
     def plan_overtaking_maneuver(self, car, car_ahead, gap_info, track_spline):
         """
@@ -175,19 +306,19 @@ class AdvancedDriving:
         
         Args:
             car: Current car
-            car_ahead: Car ahead dict
-            gap_info: Gap info from check_overtaking_gap
+            car_ahead: CarAheadInfo for the car ahead
+            gap_info: GapInfo from check_overtaking_gap
             track_spline: Track spline dict
         
         Returns:
-            Dict with 'steering_adjustment', 'throttle_boost', 'target_line_offset'
+            OvertakingManeuver with 'steering_adjustment', 'throttle_boost', 'target_line_offset'
         """
-        if not gap_info['can_overtake']:
-            return {'steering_adjustment': 0.0, 'throttle_boost': 0.0, 'target_line_offset': 0.0}
+        if not gap_info.can_overtake:
+            return NO_MANEUVER
         
         # Calculate steering adjustment based on gap side
-        side = gap_info['side']
-        gap_center = gap_info.get('gap_center', 0)
+        side = gap_info.side
+        gap_center = gap_info.gap_center
         
         # Normalize gap center to steering angle
         n_rays = 360  # Assume 360 rays
@@ -200,9 +331,9 @@ class AdvancedDriving:
         steering_adjustment = np.clip(normalized_pos * 0.5, -1.0, 1.0)
         
         # Throttle boost when in slipstream
-        time_gap = car_ahead['time_gap']
+        time_gap = car_ahead.time_gap
         if time_gap < self.slipstream_distance:
-            throttle_boost = self.slipstream_boost_max * (1 - time_gap / self.slipstream_distance)
+            throttle_boost = self.slipstream_boost_max * (1 - time_gap * self._inv_slipstream_distance)
         else:
             throttle_boost = 0.0
         
@@ -212,12 +343,7 @@ class AdvancedDriving:
         else:
             target_line_offset = 2.0  # Move right (outside)
         
-        return {
-            'steering_adjustment': steering_adjustment,
-            'throttle_boost': throttle_boost,
-            'target_line_offset': target_line_offset,
-            'overtaking': True
-        }
+        return OvertakingManeuver(float(steering_adjustment), throttle_boost, target_line_offset, True)
     
     def check_drs_eligibility(self, car, car_ahead, track_spline):
         """
@@ -225,26 +351,25 @@ class AdvancedDriving:
         
         Args:
             car: Current car
-            car_ahead: Car ahead dict or None
+            car_ahead: CarAheadInfo or None
             track_spline: Track spline dict
         
         Returns:
             True if DRS can be activated
         """
-        if car.v < self.drs_min_speed / 3.6:  # Convert km/h to m/s
+        if car.v < self.drs_min_ms:
             return False
         
         if car_ahead is None:
             return False
         
         # Check if within activation distance
-        time_gap = car_ahead['time_gap']
+        time_gap = car_ahead.time_gap
         if time_gap > self.drs_activation_distance:
             return False
         
         # Check if on straight (low curvature)
-        u = track_spline['s_to_u'](car.s)
-        curvature = track_spline['curv'](u)
+        curvature = track_spline['curv_lut'][_lut_index(track_spline, car.s)]
         
         if abs(curvature) > 0.005:  # Not a straight
             return False
@@ -257,7 +382,7 @@ class AdvancedDriving:
         
         Args:
             car: Current car
-            car_ahead: Car ahead dict or None
+            car_ahead: CarAheadInfo or None
         
         Returns:
             Speed boost multiplier
@@ -265,13 +390,13 @@ class AdvancedDriving:
         if car_ahead is None:
             return 1.0
         
-        time_gap = car_ahead['time_gap']
+        time_gap = car_ahead.time_gap
         
         if time_gap > self.slipstream_distance:
             return 1.0
         
         # Calculate boost based on distance
-        boost_factor = 1.0 + self.slipstream_boost_max * (1 - time_gap / self.slipstream_distance)
+        boost_factor = 1.0 + self.slipstream_boost_max * (1 - time_gap * self._inv_slipstream_distance)
         
         return boost_factor
     
@@ -285,44 +410,27 @@ class AdvancedDriving:
             lookahead_time: Time ahead to calculate line
         
         Returns:
-            List of waypoints along racing line
+            (n, 2) array of waypoints along racing line. This is a buffer
+            reused on every call; copy it to keep the waypoints around.
         """
-        waypoints = []
         lookahead_distance = car.v * lookahead_time
         
-        # Sample points along track
-        n_samples = 10
-        for i in range(n_samples):
-            s_ahead = car.s + lookahead_distance * (i + 1) / n_samples
-            u_ahead = track_spline['s_to_u'](s_ahead)
-            
-            # Get centerline position
-            pos_center = track_spline['pos'](u_ahead)[0]
-            
-            # Get curvature
-            curvature = track_spline['curv'](u_ahead)
-            
-            # Calculate optimal offset
-            offset = self._calculate_line_offset(curvature, car.v)
-            
-            # Apply offset perpendicular to track direction
-            u2 = track_spline['s_to_u'](s_ahead + 1.0)
-            pos2 = track_spline['pos'](u2)[0]
-            dx = pos2[0] - pos_center[0]
-            dy = pos2[1] - pos_center[1]
-            length = np.sqrt(dx**2 + dy**2)
-            
-            if length > 1e-6:
-                perp_x = -dy / length
-                perp_y = dx / length
-                
-                waypoint_x = pos_center[0] + perp_x * offset
-                waypoint_y = pos_center[1] + perp_y * offset
-            else:
-                waypoint_x = pos_center[0]
-                waypoint_y = pos_center[1]
-            
-            waypoints.append([waypoint_x, waypoint_y])
+        # Sample points along track and read centerline, curvature and
+        # tangent for all of them straight from the centerline LUT
+        s_samples = car.s + lookahead_distance * self._racing_line_fracs
+        idx = _lut_index(track_spline, s_samples)
+        pos_center = track_spline['pos_lut'][idx]
+        tangent = track_spline['tang_lut'][idx]
+        
+        # Calculate optimal offset at every sample
+        offsets = self._calculate_line_offset(track_spline['curv_lut'][idx], car.v)
+        
+        # Apply offset perpendicular to track direction (tangent is unit length)
+        waypoints = self._waypoints_buf
+        np.multiply(tangent[:, 1], offsets, out=waypoints[:, 0])
+        np.subtract(pos_center[:, 0], waypoints[:, 0], out=waypoints[:, 0])
+        np.multiply(tangent[:, 0], offsets, out=waypoints[:, 1])
+        np.add(pos_center[:, 1], waypoints[:, 1], out=waypoints[:, 1])
         
         return waypoints
     
@@ -331,31 +439,17 @@ class AdvancedDriving:
         Calculate racing line offset from centerline.
         
         Args:
-            curvature: Track curvature
-            speed: Current speed
+            curvature: Track curvature (scalar or array)
+            speed: Current speed (scalar or array)
         
         Returns:
             Offset in meters (positive = outside, negative = inside)
         """
-        if abs(curvature) < 1e-6:
-            return 0.0  # Straight: use centerline
-        
-        radius = 1.0 / abs(curvature)
-        
         # Racing line strategy:
         # - Slow corners (< 30 m/s): Late apex (start wide, cut inside)
         # - Medium corners (30-60 m/s): Slight inside
-        # - Fast corners (> 60 m/s): Slight outside
-        
-        if speed < 30:
-            # Late apex: wide entry, tight exit
-            return -radius * 0.25  # Inside
-        elif speed < 60:
-            # Medium: slight inside
-            return -radius * 0.15
-        else:
-            # Fast: slight outside for stability
-            return radius * 0.1
+        # - Fast corners (> 60 m/s): Slight outside for stability
+        return _line_offset_vec(curvature, speed)
     
     def defensive_blocking(self, car, car_behind, track_spline):
         """
@@ -375,31 +469,22 @@ class AdvancedDriving:
         # Simple blocking: move toward the side the following car is on
         # This is simplified - real F1 drivers use more sophisticated tactics
         
-        # Get relative positions
-        u_car = track_spline['s_to_u'](car.s)
-        pos_car = track_spline['pos'](u_car)[0]
-        
-        u_behind = track_spline['s_to_u'](car_behind.s)
-        pos_behind = track_spline['pos'](u_behind)[0]
+        # Get relative positions and car heading from the centerline LUT
+        idx = _lut_index(track_spline, np.array([car.s, car_behind.s]))
+        pos_car = track_spline['pos_lut'][idx[0]]
+        pos_behind = track_spline['pos_lut'][idx[1]]
+        tangent = track_spline['tang_lut'][idx[0]]
         
         # Calculate relative angle
         dx = pos_behind[0] - pos_car[0]
         dy = pos_behind[1] - pos_car[1]
-        angle = np.arctan2(dy, dx)
+        angle = math.atan2(dy, dx)
         
         # Get car heading
-        u2 = track_spline['s_to_u'](car.s + 1.0)
-        pos2 = track_spline['pos'](u2)[0]
-        car_heading = np.arctan2(pos2[1] - pos_car[1], pos2[0] - pos_car[0])
+        car_heading = math.atan2(tangent[1], tangent[0])
         
-        # Relative angle
-        rel_angle = angle - car_heading
-        
-        # Normalize to [-pi, pi]
-        while rel_angle > np.pi:
-            rel_angle -= 2 * np.pi
-        while rel_angle < -np.pi:
-            rel_angle += 2 * np.pi
+        # Relative angle, normalized to [-pi, pi)
+        rel_angle = (angle - car_heading + math.pi) % (2 * math.pi) - math.pi
         
         # Block by moving toward the following car's side
         # But limit to reasonable amount (one move per lap rule)
@@ -423,39 +508,50 @@ class AdvancedDriving:
         Returns:
             Dict with 'should_pit', 'recommended_tyre'
         """
-        # Don't pit if 3 or fewer laps remaining
-        if race_laps_remaining <= 3:
-            return {
-                'should_pit': False,
-                'recommended_tyre': car.tyre
-            }
-        
-        # Simple strategy: pit when tire wear > 70% or fuel < 20%
-        should_pit = False
-        recommended_tyre = car.tyre
-        
-        # Check tire wear
-        if car.wear > 0.7:
-            should_pit = True
-            # Recommend softer compound if race is ending soon
-            if race_laps_remaining < 5:
-                recommended_tyre = 'SOFT'
-            elif race_laps_remaining < 10:
-                recommended_tyre = 'MEDIUM'
-            else:
-                recommended_tyre = 'HARD'
-        
-        # Check fuel
-        if car.fuel < 20.0:
-            should_pit = True
-        
-        # Check weather (switch to wet tires if rain)
-        if weather.get('rain', 0) > 0.3 and car.tyre != 'WET':
-            should_pit = True
-            recommended_tyre = 'WET'
+        tyre_code = TYRE_CODES.get(car.tyre, -1)
+        should_pit, recommended = self.calculate_pit_strategy_batch(
+            np.array([car.wear]), np.array([car.fuel]), np.array([tyre_code]),
+            race_laps_remaining, weather.get('rain', 0)
+        )
         
+        recommended_code = int(recommended[0])
         return {
-            'should_pit': should_pit,
-            'recommended_tyre': recommended_tyre
+            'should_pit': bool(should_pit[0]),
+            'recommended_tyre': car.tyre if recommended_code == tyre_code else TYRE_NAMES[recommended_code]
         }
-
+    
+    def calculate_pit_strategy_batch(self, wear, fuel, tyre_codes, laps_remaining, rain):
+        """
+        Calculate pit stop strategy for the whole grid at once.
+        
+        Args:
+            wear: Array of tyre wear (0-1)
+            fuel: Array of fuel levels
+            tyre_codes: Integer array of current compounds (TYRE_SOFT..TYRE_WET)
+            laps_remaining: Laps remaining in race (scalar or array)
+            rain: Rain intensity (0-1)
+        
+        Returns:
+            (should_pit_mask, recommended_tyre_codes) arrays
+        """
+        tyre_codes = np.asarray(tyre_codes)
+        laps_remaining = np.asarray(laps_remaining)
+        
+        # Simple strategy: pit when tire wear > 70% or fuel < 20%
+        worn = np.asarray(wear) > 0.7
+        # Switch to wet tires if rain
+        needs_wets = (rain > 0.3) & (tyre_codes != TYRE_WET)
+        should_pit = worn | (np.asarray(fuel) < 20.0) | needs_wets
+        
+        # Recommend softer compound if race is ending soon
+        ladder = np.where(laps_remaining < 5, TYRE_SOFT,
+                          np.where(laps_remaining < 10, TYRE_MEDIUM, TYRE_HARD))
+        recommended = np.where(worn, ladder, tyre_codes)
+        recommended = np.where(needs_wets, TYRE_WET, recommended)
+        
+        # Don't pit if 3 or fewer laps remaining
+        race_ending = laps_remaining <= 3
+        should_pit = should_pit & ~race_ending
+        recommended = np.where(race_ending, tyre_codes, recommended)
+        
+        return should_pit, recommended
@@ -4,8 +4,44 @@ Adapts 3D controllers to 2D coordinate system and implements hybrid controller l
 """
 
 import numpy as np
+import math
 import sys
 import os
+from collections import OrderedDict
+
+from advanced_driving import _lidar_decision, _line_offset_vec, _lut_index
+from numba_compat import njit
+
+
+@njit(cache=True)
+def _front_stats(front):
+    """
+    Min distance and left/right half means of the front LiDAR sector in one pass.
+    
+    Args:
+        front: 1D float array of front sector distances
+    
+    Returns:
+        (min_dist, left_mean, right_mean)
+    """
+    n = front.shape[0]
+    half = n // 2
+    min_dist = np.inf
+    sum_left = 0.0
+    sum_right = 0.0
+    
+    for i in range(n):
+        v = front[i]
+        if v < min_dist:
+            min_dist = v
+        if i < half:
+            sum_left += v
+        else:
+            sum_right += v
+    
+    left = sum_left / half if half > 0 else 0.0
+    right = sum_right / (n - half) if n > half else 0.0
+    return min_dist, left, right
 
 # Add parent directory to path to import controllers
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -18,29 +54,42 @@ except ImportError:
     print("Warning: Could not import controllers from racecar_gym. Using simplified versions.")
     
     class FollowGapController:
+        needs_pose = False  # only reads observation['lidar']
+        
         def __init__(self, **kwargs):
             self.target_speed = kwargs.get('target_speed', 0.8)
             self.min_gap_size = kwargs.get('min_gap_size', 0.3)
+            
+            # Front sector bounds, recomputed only if the scan size changes
+            self._n_rays = 0
+            self._front_start = 0
+            self._front_end = 0
         
         def act(self, observation):
             lidar = observation.get('lidar', np.array([]))
-            if len(lidar) == 0:
+            n_rays = len(lidar)
+            if n_rays == 0:
                 return {'motor': 0.0, 'steering': 0.0}
             
+            if n_rays != self._n_rays:
+                self._n_rays = n_rays
+                self._front_start = n_rays // 4
+                self._front_end = 3 * n_rays // 4
+            
             # Simple gap finding
-            front_lidar = lidar[len(lidar)//4:3*len(lidar)//4]
-            min_dist = np.min(front_lidar)
+            front_lidar = np.asarray(lidar[self._front_start:self._front_end], dtype=np.float64)
+            min_dist, left, right = _front_stats(front_lidar)
             
             if min_dist > 0.5:
                 return {'motor': self.target_speed, 'steering': 0.0}
             else:
                 # Turn toward largest gap
-                left = np.mean(front_lidar[:len(front_lidar)//2])
-                right = np.mean(front_lidar[len(front_lidar)//2:])
                 steering = 0.5 if left > right else -0.5
                 return {'motor': self.target_speed * 0.5, 'steering': steering}
     
     class PurePursuitController:
+        needs_pose = False  # ignores the observation body
+        
         def __init__(self, **kwargs):
             self.lookahead = kwargs.get('lookahead_distance', 0.6)
             self.target_speed = kwargs.get('target_speed', 0.8)
@@ -69,14 +118,22 @@ class ControllerAdapter:
         self.follow_gap = FollowGapController(**follow_gap_params)
         self.pure_pursuit = PurePursuitController(**pure_pursuit_params)
         
+        # Controllers that don't read pose/velocity get a LiDAR-only observation
+        self.follow_gap_needs_pose = getattr(self.follow_gap, 'needs_pose', True)
+        self.pure_pursuit_needs_pose = getattr(self.pure_pursuit, 'needs_pose', True)
+        
         # Hybrid controller parameters
         self.obstacle_threshold = 3.0  # meters - switch to FollowGap if obstacle closer
         self.curvature_threshold = 0.01  # High curvature -> use PurePursuit
         self.gap_size_threshold = 0.5  # meters - large gap -> use FollowGap
         
         self.current_controller_type = 'pure_pursuit'
+        
+        # Observation buffers reused by car_to_observation (z, roll, pitch, vz stay 0)
+        self._pose_buf = np.zeros(6)
+        self._vel_buf = np.zeros(3)
     
-    def car_to_observation(self, car, track_spline, lidar_data=None):
+    def car_to_observation(self, car, track_spline, lidar_data=None, needs_pose=True):
         """
         Convert CarState to observation dict for controllers.
         
@@ -84,32 +141,39 @@ class ControllerAdapter:
             car: CarState object
             track_spline: Track spline dict
             lidar_data: LiDAR scan array (optional)
+            needs_pose: Also fill 'pose' and 'velocity' (skipped for controllers
+                that only read the LiDAR)
         
         Returns:
-            Observation dict with 'lidar', 'pose', 'velocity'
+            Observation dict with 'lidar', plus 'pose' and 'velocity' if needs_pose.
+            'pose' and 'velocity' are buffers overwritten by the next call.
         """
-        # Get car position
-        u = track_spline['s_to_u'](car.s)
-        pos = track_spline['pos'](u)[0]
-        x, y = pos[0], pos[1]
+        # LiDAR data
+        if lidar_data is None:
+            # Generate dummy LiDAR if not provided
+            lidar_data = np.ones(360) * 10.0
+        
+        if not needs_pose:
+            return {'lidar': lidar_data}
+        
+        # Get car position and heading from the centerline LUT
+        idx = _lut_index(track_spline, car.s)
+        x, y = track_spline['pos_lut'][idx]
+        tangent = track_spline['tang_lut'][idx]
         
         # Calculate heading
-        u2 = track_spline['s_to_u'](car.s + 1.0)
-        pos2 = track_spline['pos'](u2)[0]
-        yaw = np.arctan2(pos2[1] - pos[1], pos2[0] - pos[0])
+        yaw = math.atan2(tangent[1], tangent[0])
         
         # Convert to 3D pose format: [x, y, z, roll, pitch, yaw]
-        pose = np.array([x, y, 0.0, 0.0, 0.0, yaw])
+        pose = self._pose_buf
+        pose[0] = x
+        pose[1] = y
+        pose[5] = yaw
         
         # Velocity: [vx, vy, vz]
-        vx = car.v * np.cos(yaw)
-        vy = car.v * np.sin(yaw)
-        velocity = np.array([vx, vy, 0.0])
-        
-        # LiDAR data
-        if lidar_data is None:
-            # Generate dummy LiDAR if not provided
-            lidar_data = np.ones(360) * 10.0
+        velocity = self._vel_buf
+        velocity[0] = car.v * math.cos(yaw)
+        velocity[1] = car.v * math.sin(yaw)
         
         observation = {
             'lidar': lidar_data,
@@ -140,8 +204,7 @@ class ControllerAdapter:
         
         # Get position ahead along track
         s_ahead = car.s + adaptive_lookahead
-        u_ahead = track_spline['s_to_u'](s_ahead)
-        pos_ahead = track_spline['pos'](u_ahead)[0]
+        pos_ahead = track_spline['pos_lut'][_lut_index(track_spline, s_ahead)]
         
         # Convert to 3D waypoint
         waypoint = np.array([pos_ahead[0], pos_ahead[1], 0.0])
@@ -162,39 +225,11 @@ class ControllerAdapter:
         if len(lidar_data) == 0:
             return False
         
-        # Check front sector for obstacles
-        front_start = len(lidar_data) // 4
-        front_end = 3 * len(lidar_data) // 4
-        front_lidar = lidar_data[front_start:front_end]
-        
-        # Check minimum distance
-        min_front_dist = np.min(front_lidar)
-        if min_front_dist < self.obstacle_threshold:
-            return True
-        
-        # Check for large gaps (overtaking opportunity)
-        gap_threshold = self.gap_size_threshold
-        gaps = []
-        in_gap = False
-        gap_start = None
-        
-        for i, dist in enumerate(front_lidar):
-            if dist > gap_threshold:
-                if not in_gap:
-                    gap_start = i
-                    in_gap = True
-            else:
-                if in_gap:
-                    gap_size = i - gap_start
-                    gaps.append(gap_size)
-                    in_gap = False
-        
-        if in_gap:
-            gap_size = len(front_lidar) - gap_start
-            gaps.append(gap_size)
-        
-        # Use FollowGap if large gap detected
-        if gaps and max(gaps) > len(front_lidar) * 0.3:
+        # Close obstacle or large gap (overtaking opportunity) in the front sector
+        use_follow_gap, _, _, _, _ = _lidar_decision(
+            np.asarray(lidar_data, dtype=np.float64), self.obstacle_threshold, self.gap_size_threshold
+        )
+        if use_follow_gap:
             return True
         
         # Use PurePursuit on straights (low curvature)
@@ -217,12 +252,13 @@ class ControllerAdapter:
         Returns:
             Action dict with 'motor' and 'steering', and 'controller_type'
         """
-        # Generate observation
-        observation = self.car_to_observation(car, track_spline, lidar_data)
-        
         # Decide which controller to use
         use_follow_gap = self.should_use_follow_gap(lidar_data, track_curvature)
         
+        # Generate observation (pose/velocity only if the controller reads them)
+        needs_pose = self.follow_gap_needs_pose if use_follow_gap else self.pure_pursuit_needs_pose
+        observation = self.car_to_observation(car, track_spline, lidar_data, needs_pose)
+        
         if use_follow_gap:
             # Use FollowGap controller
             action = self.follow_gap.act(observation)
@@ -252,6 +288,76 @@ class ControllerAdapter:
             self.pure_pursuit.update_params(**kwargs)
 
 
+def get_action_batch(adapters, cars, track_spline, lidar_batch, curvature_batch, cars_s=None):
+    """
+    Hybrid controller actions for a whole grid in one call.
+    
+    Poses, velocities and PurePursuit waypoints are computed for all cars at
+    once from the centerline LUT; only the controller act() calls remain
+    per car. Equivalent to calling adapters[i].get_action(cars[i], ...) for
+    each car with the same inputs.
+    
+    Args:
+        adapters: ControllerAdapter per car
+        cars: List of CarState objects
+        track_spline: Track spline dict
+        lidar_batch: LiDAR scan per car (None entries get a dummy scan)
+        curvature_batch: Track curvature per car
+        cars_s: Array of track positions for cars (optional, built if None)
+    
+    Returns:
+        List of action dicts with 'motor', 'steering' and 'controller_type'
+    """
+    n = len(cars)
+    if n == 0:
+        return []
+    
+    if cars_s is None:
+        cars_s = np.array([c.s for c in cars], dtype=float)
+    v = np.array([c.v for c in cars], dtype=float)
+    
+    # Pose [x, y, z, roll, pitch, yaw] and velocity [vx, vy, vz] for every car
+    idx = _lut_index(track_spline, cars_s)
+    tangents = track_spline['tang_lut'][idx]
+    yaw = np.arctan2(tangents[:, 1], tangents[:, 0])
+    poses = np.zeros((n, 6))
+    poses[:, :2] = track_spline['pos_lut'][idx]
+    poses[:, 5] = yaw
+    velocities = np.zeros((n, 3))
+    velocities[:, 0] = v * np.cos(yaw)
+    velocities[:, 1] = v * np.sin(yaw)
+    
+    # PurePursuit waypoints (same speed-scaled lookahead as generate_waypoint)
+    lookahead = np.array([a.pure_pursuit.lookahead for a in adapters], dtype=float)
+    s_ahead = cars_s + lookahead * np.maximum(1.0, v / 20.0)
+    waypoints = np.zeros((n, 3))
+    waypoints[:, :2] = track_spline['pos_lut'][_lut_index(track_spline, s_ahead)]
+    
+    actions = []
+    for i, adapter in enumerate(adapters):
+        lidar_data = lidar_batch[i]
+        if lidar_data is None:
+            lidar_data = np.ones(360) * 10.0
+        use_follow_gap = adapter.should_use_follow_gap(lidar_data, curvature_batch[i])
+        
+        observation = {'lidar': lidar_data}
+        if adapter.follow_gap_needs_pose if use_follow_gap else adapter.pure_pursuit_needs_pose:
+            observation['pose'] = poses[i]
+            observation['velocity'] = velocities[i]
+        
+        if use_follow_gap:
+            action = adapter.follow_gap.act(observation)
+            adapter.current_controller_type = 'follow_gap'
+        else:
+            action = adapter.pure_pursuit.act(observation, {'next_waypoint': waypoints[i]})
+            adapter.current_controller_type = 'pure_pursuit'
+        
+        action['controller_type'] = adapter.current_controller_type
+        actions.append(action)
+    
+    return actions
+
+
 class RacingLineController:
     """
     Enhanced controller that uses racing line optimization.
@@ -268,35 +374,27 @@ class RacingLineController:
         """
         self.base_adapter = base_adapter
         self.track_spline = track_spline
-        self.racing_line_cache = {}
+        
+        # LRU cache of waypoints keyed by (LUT index, integer speed)
+        self.racing_line_cache = OrderedDict()
+        self.racing_line_cache_size = 4096
+        self._cache_track_id = id(track_spline)
     
     def calculate_racing_line(self, curvature, speed):
         """
         Calculate optimal racing line offset from centerline.
         
         Args:
-            curvature: Track curvature
-            speed: Current speed
+            curvature: Track curvature (scalar or array)
+            speed: Current speed (scalar or array)
         
         Returns:
             Offset from centerline (positive = outside, negative = inside)
         """
         # Simplified racing line: late apex for slow corners, early for fast
-        if abs(curvature) < 1e-6:
-            return 0.0  # Straight: use centerline
-        
-        radius = 1.0 / abs(curvature)
-        
-        # Determine corner speed category
-        if speed < 30:  # Slow corner
-            # Late apex: start wide, cut inside
-            offset = -radius * 0.3  # Inside
-        elif speed < 60:  # Medium corner
-            offset = -radius * 0.2  # Slightly inside
-        else:  # Fast corner
-            offset = radius * 0.1  # Slightly outside
-        
-        return offset
+        # Slow (< 30): start wide, cut inside; medium (30-60): slightly inside;
+        # fast (> 60): slightly outside
+        return _line_offset_vec(curvature, speed, slow_factor=-0.3, medium_factor=-0.2, fast_factor=0.1)
     
     def generate_racing_line_waypoint(self, car, lookahead_distance):
         """
@@ -309,39 +407,36 @@ class RacingLineController:
         Returns:
             Waypoint dict
         """
-        # Get position ahead
-        s_ahead = car.s + lookahead_distance
-        u_ahead = self.track_spline['s_to_u'](s_ahead)
+        # Invalidate the cache if the track has been swapped out
+        if id(self.track_spline) != self._cache_track_id:
+            self.racing_line_cache.clear()
+            self._cache_track_id = id(self.track_spline)
+        
+        # Get centerline position, curvature and tangent ahead from the LUT
+        idx = _lut_index(self.track_spline, car.s + lookahead_distance)
         
-        # Get centerline position
-        pos_center = self.track_spline['pos'](u_ahead)[0]
+        # Co-located cars and consecutive ticks share the same waypoint
+        key = (int(idx), int(car.v))
+        waypoint = self.racing_line_cache.get(key)
+        if waypoint is not None:
+            self.racing_line_cache.move_to_end(key)
+            return {'next_waypoint': waypoint}
         
-        # Get curvature
-        curvature = self.track_spline['curv'](u_ahead)
+        pos_center = self.track_spline['pos_lut'][idx]
+        tangent = self.track_spline['tang_lut'][idx]
         
         # Calculate racing line offset
-        offset = self.calculate_racing_line(curvature, car.v)
-        
-        # Calculate perpendicular direction
-        u2 = self.track_spline['s_to_u'](s_ahead + 1.0)
-        pos2 = self.track_spline['pos'](u2)[0]
-        dx = pos2[0] - pos_center[0]
-        dy = pos2[1] - pos_center[1]
-        length = np.sqrt(dx**2 + dy**2)
-        
-        if length > 1e-6:
-            # Perpendicular vector
-            perp_x = -dy / length
-            perp_y = dx / length
-            
-            # Apply offset
-            waypoint_x = pos_center[0] + perp_x * offset
-            waypoint_y = pos_center[1] + perp_y * offset
-        else:
-            waypoint_x = pos_center[0]
-            waypoint_y = pos_center[1]
+        offset = self.calculate_racing_line(self.track_spline['curv_lut'][idx], car.v)
+        
+        # Apply offset along the perpendicular (tangent is unit length)
+        waypoint_x = pos_center[0] - tangent[1] * offset
+        waypoint_y = pos_center[1] + tangent[0] * offset
         
         waypoint = np.array([waypoint_x, waypoint_y, 0.0])
+        self.racing_line_cache[key] = waypoint
+        if len(self.racing_line_cache) > self.racing_line_cache_size:
+            self.racing_line_cache.popitem(last=False)
+        
         return {'next_waypoint': waypoint}
     
     def get_action(self, car, track_spline, lidar_data=None, track_curvature=0.0):
@@ -353,13 +448,17 @@ class RacingLineController:
             use_follow_gap = self.base_adapter.should_use_follow_gap(lidar_data, track_curvature)
             
             if use_follow_gap:
-                observation = self.base_adapter.car_to_observation(car, track_spline, lidar_data)
+                observation = self.base_adapter.car_to_observation(
+                    car, track_spline, lidar_data, self.base_adapter.follow_gap_needs_pose
+                )
                 action = self.base_adapter.follow_gap.act(observation)
                 action['controller_type'] = 'follow_gap'
                 return action
         
         # Use racing line PurePursuit
-        observation = self.base_adapter.car_to_observation(car, track_spline, lidar_data)
+        observation = self.base_adapter.car_to_observation(
+            car, track_spline, lidar_data, self.base_adapter.pure_pursuit_needs_pose
+        )
         state = self.generate_racing_line_waypoint(car, self.base_adapter.pure_pursuit.lookahead)
         action = self.base_adapter.pure_pursuit.act(observation, state)
         action['controller_type'] = 'racing_line'
@@ -11,6 +11,241 @@ Implements realistic F1 car physics including:
 
 import numpy as np
 import math
+from dataclasses import dataclass
+
+from numba_compat import njit, prange, NUMBA_AVAILABLE
+from physics_kernels import aot_kernel
+
+
+# Integer tire compound codes for the array (batched) code paths
+COMPOUND_SOFT, COMPOUND_MEDIUM, COMPOUND_HARD, COMPOUND_WET = 0, 1, 2, 3
+COMPOUND_CODES = {'SOFT': COMPOUND_SOFT, 'MEDIUM': COMPOUND_MEDIUM,
+                  'HARD': COMPOUND_HARD, 'WET': COMPOUND_WET}
+
+# Tire grip multiplier and heat generation factor per compound code
+_COMPOUND_GRIP = np.array([1.0, 0.95, 0.90, 0.78])
+_COMPOUND_HEAT = np.array([1.2, 1.0, 0.8, 0.9])
+
+# Integer engine mode codes and their power multipliers
+ENGINE_CONSERVATIVE, ENGINE_NORMAL, ENGINE_AGGRESSIVE = 0, 1, 2
+ENGINE_MODE_CODES = {'conservative': ENGINE_CONSERVATIVE, 'normal': ENGINE_NORMAL,
+                     'aggressive': ENGINE_AGGRESSIVE}
+_ENGINE_MODE_MULT = np.array([0.85, 1.0, 1.15])
+
+
+@njit(cache=True, fastmath=True)
+def _rpm_kernel(speed, gear, gear_ratios, final_drive, wheel_radius, idle_rpm, max_rpm):
+    """Engine RPM for speed in gear (idle RPM for an invalid gear)"""
+    if gear < 1 or gear > gear_ratios.shape[0]:
+        return idle_rpm
+    
+    # RPM = (speed / wheel_radius) * gear_ratio * (60 / (2 * pi))
+    rpm = (speed / wheel_radius) * gear_ratios[gear - 1] * final_drive * 9.55
+    return min(max(rpm, idle_rpm), max_rpm)
+
+
+@njit(cache=True, fastmath=True)
+def _select_gear_kernel(speed, gear, throttle, gear_ratios, final_drive, wheel_radius,
+                        idle_rpm, max_rpm):
+    """Up/downshift decision from speed, current gear and throttle"""
+    if speed < 5.0:  # Very slow, use first gear
+        return 1
+    
+    rpm = _rpm_kernel(speed, gear, gear_ratios, final_drive, wheel_radius, idle_rpm, max_rpm)
+    
+    # Upshift if RPM too high
+    if rpm > 14000 and gear < gear_ratios.shape[0]:
+        return gear + 1
+    
+    # Downshift if RPM too low and throttle applied
+    if rpm < 8000 and gear > 1 and throttle > 0.5:
+        return gear - 1
+    
+    return gear
+
+
+@njit(cache=True, fastmath=True)
+def _accel_kernel(speed, throttle, gear, mode_mult, mass, gear_ratios, final_drive, wheel_radius,
+                  idle_rpm, max_rpm, power_max, gravity):
+    """
+    Power-limited acceleration net of rolling resistance (aerodynamic drag
+    is applied once by the physics step). Returns (acceleration, rpm).
+    """
+    if speed < 0.1:  # Prevent division by zero
+        speed = 0.1
+    
+    # Calculate RPM and power (curve peaks at ~0.8 of max RPM)
+    rpm = _rpm_kernel(speed, gear, gear_ratios, final_drive, wheel_radius, idle_rpm, max_rpm)
+    rpm_norm = min(max(rpm / max_rpm, 0.0), 1.0)
+    power = power_max * math.sin(rpm_norm * math.pi * 0.625) * mode_mult * throttle
+    
+    # P = F * v, so F = P / v; subtract rolling resistance
+    net_force = power / speed - 0.02 * mass * gravity
+    
+    # Limit acceleration (traction limited, ~2g)
+    acceleration = min(max(net_force / mass, 0.0), 2.0 * gravity)
+    return acceleration, rpm
+
+
+@njit(cache=True, fastmath=True)
+def _brake_kernel(speed, brake_pressure, mass, brake_friction, brake_bias_front,
+                  max_brake_decel, gravity):
+    """Speed-dependent braking deceleration with front/rear distribution"""
+    if speed < 0.1:
+        return 0.0
+    
+    # Speed-dependent brake effectiveness (v_max ~360 km/h)
+    speed_factor = math.sqrt(max(1 - speed / 100.0, 0.0))
+    brake_force_total = brake_pressure * brake_friction * speed_factor * mass * gravity
+    
+    # Weight transfer during braking (more load on front)
+    weight = mass * gravity
+    weight_transfer = 0.1 * brake_force_total / mass  # Simplified
+    front_brake = brake_force_total * brake_bias_front * ((weight * 0.5 + weight_transfer) / weight)
+    rear_brake = brake_force_total * (1 - brake_bias_front) * ((weight * 0.5 - weight_transfer) / weight)
+    
+    # ABS-like behavior: limit deceleration
+    return min(max((front_brake + rear_brake) / mass, 0.0), max_brake_decel)
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _step_all(v, fuel, gear, engine_mode, drs_active, tire_temp, tire_compound, track_temp,
+              tire_grip, throttles, brakes, steerings, curvatures, dt,
+              engine_rpm, aero_downforce, out_v,
+              mode_mult, heat_factors, gear_ratios, final_drive, wheel_radius, idle_rpm, max_rpm,
+              base_mass, power_max, air_density, drag_coeff, downforce_coeff, frontal_area,
+              gravity, brake_friction, brake_bias_front, max_brake_decel):
+    """
+    Fused physics step for every car: gear, power, braking, aero, tire
+    temperature and cornering limit in one pass per car with no
+    intermediate arrays. gear, tire_temp, engine_rpm and aero_downforce are
+    updated in place and the new speeds are written to out_v.
+    """
+    quarter_weight = base_mass * gravity / 4
+    
+    for i in prange(v.shape[0]):
+        speed = v[i]
+        mass = base_mass + fuel[i] * 0.7  # Fuel adds mass (~0.7 kg per unit)
+        throttle = throttles[i]
+        brake = brakes[i]
+        
+        g = _select_gear_kernel(speed, gear[i], throttle, gear_ratios, final_drive, wheel_radius,
+                                idle_rpm, max_rpm)
+        gear[i] = g
+        
+        if throttle > 0.01:
+            accel, rpm = _accel_kernel(speed, throttle, g, mode_mult[engine_mode[i]], mass,
+                                       gear_ratios, final_drive, wheel_radius, idle_rpm, max_rpm,
+                                       power_max, gravity)
+        else:
+            accel = 0.0
+            rpm = idle_rpm
+        engine_rpm[i] = rpm
+        
+        decel = 0.0
+        if brake > 0.01:
+            decel = _brake_kernel(speed, brake, mass, brake_friction, brake_bias_front,
+                                  max_brake_decel, gravity)
+        
+        # Aerodynamic forces share the dynamic pressure term
+        q = 0.5 * air_density * frontal_area * speed * speed
+        drag_force = q * drag_coeff * (0.85 if drs_active[i] else 1.0)
+        downforce = q * downforce_coeff
+        aero_downforce[i] = downforce
+        
+        # Slip angle and per-tire front load after longitudinal weight transfer
+        slip_angle = math.atan(steerings[i] * 0.1) if speed > 0.1 else 0.0
+        normal_load = (base_mass * gravity * 0.5 - (accel - decel) * 0.3) / 2
+        
+        # Tire temperature
+        heat_gen = 0.01 * speed * abs(slip_angle) * (normal_load / quarter_weight) * heat_factors[tire_compound[i]]
+        ambient = track_temp[i]
+        temp = tire_temp[i] + (heat_gen - 0.05 * (tire_temp[i] - ambient)) * dt
+        tire_temp[i] = min(max(temp, ambient), 150.0)
+        
+        # Net acceleration, then limit by cornering capability
+        new_speed = max(0.0, speed + (accel - decel - drag_force / mass) * dt)
+        curvature = curvatures[i]
+        if curvature > 1e-6:
+            effective_grip = tire_grip[i] * (1 + 0.3 * downforce / (base_mass * gravity))
+            new_speed = min(new_speed, math.sqrt(effective_grip * gravity / curvature))
+        out_v[i] = new_speed
+
+
+# Precompiled step (physics_kernels.py) skips JIT warm-up; else the JIT kernel
+_step_all_compiled = aot_kernel('step_all') or (_step_all if NUMBA_AVAILABLE else None)
+
+
+def compound_code(tire_compound):
+    """
+    Integer compound code(s) for a compound name, code, or array of codes.
+    Unknown names map to MEDIUM.
+    """
+    if isinstance(tire_compound, str):
+        return COMPOUND_CODES.get(tire_compound, COMPOUND_MEDIUM)
+    if isinstance(tire_compound, (int, np.integer)):
+        return tire_compound
+    return np.asarray(tire_compound, dtype=np.int64)
+
+
+def engine_mode_code(engine_mode):
+    """
+    Integer engine mode code for a mode name or code. Unknown names map to normal.
+    """
+    if isinstance(engine_mode, str):
+        return ENGINE_MODE_CODES.get(engine_mode, ENGINE_NORMAL)
+    return engine_mode
+
+
+@dataclass
+class CarStatesSoA:
+    """
+    Physics state for a whole grid as parallel arrays (one entry per car),
+    stepped in one go by PhysicsEngine.apply_physics_step_batch.
+    """
+    v: np.ndarray
+    fuel: np.ndarray
+    gear: np.ndarray  # int
+    engine_mode: np.ndarray  # int ENGINE_* codes
+    drs_active: np.ndarray  # bool
+    tire_temp: np.ndarray
+    tyre: np.ndarray  # int COMPOUND_* codes (grip)
+    tire_compound: np.ndarray  # int COMPOUND_* codes (heat)
+    track_temp: np.ndarray
+    tire_grip: np.ndarray
+    engine_rpm: np.ndarray
+    aero_downforce: np.ndarray
+    
+    @classmethod
+    def from_cars(cls, cars):
+        """Gather the physics fields of a list of CarState objects"""
+        def column(name, dtype=float):
+            return np.array([getattr(c, name) for c in cars], dtype=dtype)
+        
+        tyre = column('tyre_code', np.int64)
+        return cls(
+            v=column('v'),
+            fuel=column('fuel'),
+            gear=column('gear', np.int64),
+            engine_mode=column('engine_mode_code', np.int64),
+            drs_active=column('drs_active', bool),
+            tire_temp=column('tire_temp'),
+            tyre=tyre,
+            tire_compound=tyre.copy(),
+            track_temp=column('track_temp'),
+            tire_grip=column('tire_grip'),
+            engine_rpm=column('engine_rpm'),
+            aero_downforce=column('aero_downforce'),
+        )
+    
+    def write_back(self, cars):
+        """Copy the stepped state back onto the CarState objects"""
+        for i, c in enumerate(cars):
+            c.v = float(self.v[i])
+            c.gear = int(self.gear[i])
+            c.engine_rpm = float(self.engine_rpm[i])
+            c.aero_downforce = float(self.aero_downforce[i])
+            c.tire_temp = float(self.tire_temp[i])
 
 
 class PhysicsEngine:
@@ -27,6 +262,7 @@ class PhysicsEngine:
     
     # Gear ratios (8-speed transmission)
     GEAR_RATIOS = [2.9, 2.0, 1.5, 1.2, 1.0, 0.85, 0.75, 0.65]
+    GEAR_RATIOS_ARR = np.array(GEAR_RATIOS)
     FINAL_DRIVE = 3.5
     WHEEL_RADIUS = 0.33  # m
     
@@ -52,6 +288,7 @@ class PhysicsEngine:
         """
         Calculate engine power at given RPM.
         Power curve peaks around 12,000 RPM.
+        engine_mode may be a mode name or an ENGINE_* code.
         """
         # Normalize RPM
         rpm_norm = np.clip(rpm / self.max_rpm, 0, 1)
@@ -59,13 +296,8 @@ class PhysicsEngine:
         # Power curve: peak at ~0.8 (12k RPM)
         power_factor = np.sin(rpm_norm * np.pi * 0.625)  # Peak at 0.8
         
-        # Engine mode multipliers
-        mode_multipliers = {
-            'conservative': 0.85,
-            'normal': 1.0,
-            'aggressive': 1.15
-        }
-        multiplier = mode_multipliers.get(engine_mode, 1.0)
+        # Engine mode multiplier
+        multiplier = _ENGINE_MODE_MULT[engine_mode_code(engine_mode)]
         
         return self.POWER_MAX * power_factor * multiplier
     
@@ -82,62 +314,29 @@ class PhysicsEngine:
         # RPM = (speed / wheel_radius) * gear_ratio * (60 / (2 * pi))
         rpm = (speed / self.WHEEL_RADIUS) * gear_ratio * 9.55
         
-        return np.clip(rpm, self.idle_rpm, self.max_rpm)
+        return min(max(rpm, self.idle_rpm), self.max_rpm)
     
     def select_gear(self, speed, current_gear, throttle):
         """
         Simple gear selection logic based on speed and RPM.
         """
-        if speed < 5.0:  # Very slow, use first gear
-            return 1
-        
-        # Calculate RPM for current gear
-        rpm = self.calculate_rpm_from_speed(speed, current_gear)
-        
-        # Upshift if RPM too high
-        if rpm > 14000 and current_gear < len(self.GEAR_RATIOS):
-            return current_gear + 1
-        
-        # Downshift if RPM too low and throttle applied
-        if rpm < 8000 and current_gear > 1 and throttle > 0.5:
-            return current_gear - 1
-        
-        return current_gear
+        return _select_gear_kernel(speed, current_gear, throttle, self.GEAR_RATIOS_ARR,
+                                   self.FINAL_DRIVE, self.WHEEL_RADIUS,
+                                   float(self.idle_rpm), float(self.max_rpm))
     
     def calculate_acceleration(self, speed, throttle, gear, engine_mode='normal', mass=None):
         """
         Calculate acceleration using power-limited model.
-        Formula: a = (P / (m * v)) - drag_force/m
+        Formula: a = (P / v - F_rolling) / m
+        Aerodynamic drag is not included; apply_physics_step subtracts it once.
         """
         if mass is None:
             mass = self.MASS
         
-        if speed < 0.1:  # Prevent division by zero
-            speed = 0.1
-        
-        # Calculate RPM and power
-        rpm = self.calculate_rpm_from_speed(speed, gear)
-        power = self.calculate_engine_power(rpm, engine_mode) * throttle
-        
-        # Power-limited acceleration
-        # P = F * v, so F = P / v, and a = F / m
-        power_accel = power / (mass * speed)
-        
-        # Aerodynamic drag
-        drag_force = 0.5 * self.AIR_DENSITY * self.DRAG_COEFF * self.FRONTAL_AREA * speed ** 2
-        
-        # Rolling resistance (simplified)
-        rolling_resistance = 0.02 * mass * self.GRAVITY
-        
-        # Net acceleration
-        net_force = (power / speed) - drag_force - rolling_resistance
-        acceleration = net_force / mass
-        
-        # Limit acceleration (traction limited)
-        max_accel = 2.0 * self.GRAVITY  # ~2g max acceleration
-        acceleration = np.clip(acceleration, 0, max_accel)
-        
-        return acceleration, rpm
+        mode_mult = float(_ENGINE_MODE_MULT[engine_mode_code(engine_mode)])
+        return _accel_kernel(speed, throttle, gear, mode_mult, mass, self.GEAR_RATIOS_ARR,
+                             self.FINAL_DRIVE, self.WHEEL_RADIUS, float(self.idle_rpm),
+                             float(self.max_rpm), self.POWER_MAX, self.GRAVITY)
     
     def calculate_braking(self, speed, brake_pressure, mass=None):
         """
@@ -147,35 +346,8 @@ class PhysicsEngine:
         if mass is None:
             mass = self.MASS
         
-        if speed < 0.1:
-            return 0.0
-        
-        # Speed-dependent brake effectiveness
-        v_max = 100.0  # m/s (~360 km/h)
-        speed_factor = (1 - speed / v_max) ** 0.5
-        
-        # Brake force (front and rear)
-        brake_force_total = brake_pressure * self.BRAKE_FRICTION * speed_factor * mass * self.GRAVITY
-        
-        # Weight transfer during braking (more load on front)
-        weight_transfer = 0.1 * brake_force_total / mass  # Simplified
-        
-        # Front/rear brake distribution
-        front_load = mass * self.GRAVITY * 0.5 + weight_transfer
-        rear_load = mass * self.GRAVITY * 0.5 - weight_transfer
-        
-        front_brake = brake_force_total * self.BRAKE_BIAS_FRONT * (front_load / (mass * self.GRAVITY))
-        rear_brake = brake_force_total * (1 - self.BRAKE_BIAS_FRONT) * (rear_load / (mass * self.GRAVITY))
-        
-        total_brake_force = front_brake + rear_brake
-        
-        # Deceleration
-        deceleration = total_brake_force / mass
-        
-        # ABS-like behavior: limit deceleration
-        deceleration = np.clip(deceleration, 0, self.MAX_BRAKE_DECEL)
-        
-        return deceleration
+        return _brake_kernel(speed, brake_pressure, mass, self.BRAKE_FRICTION,
+                             self.BRAKE_BIAS_FRONT, self.MAX_BRAKE_DECEL, self.GRAVITY)
     
     def calculate_aerodynamic_forces(self, speed, drs_active=False):
         """
@@ -187,8 +359,10 @@ class PhysicsEngine:
         if drs_active:
             drag_coeff *= 0.85  # 15% drag reduction with DRS
         
-        drag_force = 0.5 * self.AIR_DENSITY * drag_coeff * self.FRONTAL_AREA * speed ** 2
-        downforce = 0.5 * self.AIR_DENSITY * self.DOWNFORCE_COEFF * self.FRONTAL_AREA * speed ** 2
+        # Shared dynamic pressure term 0.5 * rho * A * v^2
+        q = 0.5 * self.AIR_DENSITY * self.FRONTAL_AREA * speed * speed
+        drag_force = q * drag_coeff
+        downforce = q * self.DOWNFORCE_COEFF
         
         return drag_force, downforce
     
@@ -197,32 +371,31 @@ class PhysicsEngine:
         Simplified Pacejka tire model for lateral forces.
         F_y = D * sin(C * arctan(B * slip_angle))
         
+        All inputs broadcast, so one call can cover every tire of every car,
+        e.g. arrays of shape (n_cars, 4).
+        
         Args:
-            slip_angle: Tire slip angle in radians
-            normal_load: Normal load on tire (N)
-            tire_temp: Tire temperature (°C)
+            slip_angle: Tire slip angle(s) in radians
+            normal_load: Normal load(s) on tire (N)
+            tire_temp: Tire temperature(s) (°C)
             tire_compound: Tire compound ('SOFT', 'MEDIUM', 'HARD', 'WET')
+                or integer compound code(s)
         """
         # Compound multipliers
-        compound_multipliers = {
-            'SOFT': 1.0,
-            'MEDIUM': 0.95,
-            'HARD': 0.90,
-            'WET': 0.78
-        }
-        compound_factor = compound_multipliers.get(tire_compound, 0.95)
+        compound_factor = _COMPOUND_GRIP[compound_code(tire_compound)]
         
         # Temperature effect (optimal around 100°C)
-        temp_factor = 1.0 - 0.3 * abs((tire_temp - 100.0) / 100.0)
+        temp_factor = 1.0 - 0.3 * np.abs((np.asarray(tire_temp) - 100.0) / 100.0)
         temp_factor = np.clip(temp_factor, 0.7, 1.0)
         
         # Load sensitivity
         load_factor = np.sqrt(normal_load / (self.MASS * self.GRAVITY / 4))  # Per tire
         
         # Pacejka model
-        B = self.TIRE_B * compound_factor * temp_factor
+        grip = compound_factor * temp_factor
+        B = self.TIRE_B * grip
         C = self.TIRE_C
-        D = self.TIRE_D * normal_load * load_factor * compound_factor * temp_factor
+        D = self.TIRE_D * normal_load * load_factor * grip
         
         # Lateral force
         lateral_force = D * np.sin(C * np.arctan(B * slip_angle))
@@ -266,15 +439,10 @@ class PhysicsEngine:
     def update_tire_temperature(self, current_temp, speed, slip_angle, normal_load, ambient_temp=25.0, dt=0.1, tire_compound='MEDIUM'):
         """
         Update tire temperature based on usage.
+        tire_compound may be a compound name or a COMPOUND_* code.
         """
-        # Compound-specific heat factors
-        compound_heat_factors = {
-            'SOFT': 1.2,
-            'MEDIUM': 1.0,
-            'HARD': 0.8,
-            'WET': 0.9
-        }
-        heat_factor = compound_heat_factors.get(tire_compound, 1.0)
+        # Compound-specific heat factor
+        heat_factor = _COMPOUND_HEAT[compound_code(tire_compound)]
         
         # Heat generation from friction
         heat_gen = 0.01 * speed * abs(slip_angle) * (normal_load / (self.MASS * self.GRAVITY / 4)) * heat_factor
@@ -288,7 +456,7 @@ class PhysicsEngine:
         new_temp = current_temp + dtemp
         
         # Clamp to reasonable range
-        new_temp = np.clip(new_temp, ambient_temp, 150.0)
+        new_temp = min(max(new_temp, ambient_temp), 150.0)
         
         return new_temp
     
@@ -307,7 +475,7 @@ class PhysicsEngine:
         effective_grip = tire_grip * (1 + 0.3 * downforce_factor)  # Downforce increases grip
         
         # Maximum cornering speed
-        v_max = np.sqrt(effective_grip * self.GRAVITY * radius)
+        v_max = math.sqrt(effective_grip * self.GRAVITY * radius)
         
         return v_max
     
@@ -316,7 +484,9 @@ class PhysicsEngine:
         Apply physics step to car state.
         
         Args:
-            car_state: CarState object with physics parameters
+            car_state: CarState object with physics parameters (v, fuel, gear,
+                drs_active, tire_temp, track_temp, tire_grip and the integer
+                engine_mode_code / tyre_code)
             throttle: Throttle input (0-1)
             brake: Brake input (0-1)
             steering: Steering input (-1 to 1)
@@ -328,11 +498,11 @@ class PhysicsEngine:
         """
         # Get current state
         speed = car_state.v
-        gear = getattr(car_state, 'gear', 5)
-        engine_mode = getattr(car_state, 'engine_mode', 'normal')
-        drs_active = getattr(car_state, 'drs_active', False)
-        tire_temp = getattr(car_state, 'tire_temp', 100.0)
-        tire_compound = getattr(car_state, 'tyre', 'MEDIUM')
+        gear = car_state.gear
+        drs_active = car_state.drs_active
+        tire_temp = car_state.tire_temp
+        engine_mode = car_state.engine_mode_code
+        tire_compound = car_state.tyre_code
         mass = self.MASS + car_state.fuel * 0.7  # Fuel adds mass (~0.7 kg per unit)
         
         # Update gear
@@ -359,7 +529,7 @@ class PhysicsEngine:
         
         # Calculate slip angle (simplified)
         if speed > 0.1:
-            slip_angle = np.arctan(steering * 0.1)  # Simplified
+            slip_angle = math.atan(steering * 0.1)  # Simplified
         else:
             slip_angle = 0.0
         
@@ -372,16 +542,15 @@ class PhysicsEngine:
         tire_force = self.calculate_tire_forces(slip_angle, normal_load, tire_temp, tire_compound)
         
         # Update tire temperature
-        tire_compound = getattr(car_state, 'tire_compound', getattr(car_state, 'tyre', 'MEDIUM'))
         tire_temp = self.update_tire_temperature(
             tire_temp, speed, slip_angle, normal_load,
-            ambient_temp=getattr(car_state, 'track_temp', 25.0),
+            ambient_temp=car_state.track_temp,
             dt=dt,
             tire_compound=tire_compound
         )
         car_state.tire_temp = tire_temp
         
-        # Net acceleration
+        # Net acceleration (drag counted only here, not in calculate_acceleration)
         net_accel = accel - decel - (drag_force / mass)
         
         # Update velocity
@@ -389,7 +558,7 @@ class PhysicsEngine:
         new_speed = max(0.0, new_speed)
         
         # Calculate maximum cornering speed
-        tire_grip = getattr(car_state, 'tire_grip', 1.0)
+        tire_grip = car_state.tire_grip
         max_corner_speed = self.calculate_cornering_speed(track_curvature, downforce, tire_grip)
         
         # Limit speed by cornering capability
@@ -397,4 +566,119 @@ class PhysicsEngine:
             new_speed = min(new_speed, max_corner_speed)
         
         return new_speed
-
+    
+    def _rpm_from_speed_batch(self, speed, gear):
+        """Array version of calculate_rpm_from_speed"""
+        n_gears = len(self.GEAR_RATIOS)
+        valid = (gear >= 1) & (gear <= n_gears)
+        gear_ratio = self.GEAR_RATIOS_ARR[np.clip(gear - 1, 0, n_gears - 1)] * self.FINAL_DRIVE
+        rpm = np.clip((speed / self.WHEEL_RADIUS) * gear_ratio * 9.55, self.idle_rpm, self.max_rpm)
+        return np.where(valid, rpm, float(self.idle_rpm))
+    
+    def apply_physics_step_batch(self, states, throttles, brakes, steerings, dt, curvatures):
+        """
+        Apply one physics step to every car at once.
+        
+        Same model as apply_physics_step, evaluated over (n_cars,) arrays.
+        The lateral tire force is not computed since it does not feed back
+        into the car state. Runs the fused _step_all kernel when numba is
+        available, whole-array NumPy otherwise.
+        
+        Args:
+            states: CarStatesSoA (gear, engine_rpm, aero_downforce and
+                tire_temp are updated in place)
+            throttles: Throttle inputs (0-1)
+            brakes: Brake inputs (0-1)
+            steerings: Steering inputs (-1 to 1)
+            dt: Time step
+            curvatures: Track curvature at each car's position
+        
+        Returns:
+            Array of updated velocities
+        """
+        if _step_all_compiled is None:
+            return self._physics_step_batch_np(states, throttles, brakes, steerings, dt, curvatures)
+        
+        def f64(x):
+            return np.ascontiguousarray(np.broadcast_to(x, states.v.shape), dtype=np.float64)
+        
+        out_v = np.empty_like(states.v, dtype=np.float64)
+        _step_all_compiled(
+            f64(states.v), f64(states.fuel), states.gear, states.engine_mode, states.drs_active,
+            states.tire_temp, states.tire_compound, f64(states.track_temp), f64(states.tire_grip),
+            f64(throttles), f64(brakes), f64(steerings), f64(curvatures), float(dt),
+            states.engine_rpm, states.aero_downforce, out_v,
+            _ENGINE_MODE_MULT, _COMPOUND_HEAT, self.GEAR_RATIOS_ARR, self.FINAL_DRIVE,
+            self.WHEEL_RADIUS, float(self.idle_rpm), float(self.max_rpm),
+            self.MASS, self.POWER_MAX, self.AIR_DENSITY, self.DRAG_COEFF, self.DOWNFORCE_COEFF,
+            self.FRONTAL_AREA, self.GRAVITY, self.BRAKE_FRICTION, self.BRAKE_BIAS_FRONT,
+            self.MAX_BRAKE_DECEL
+        )
+        states.v = out_v
+        return out_v
+    
+    def _physics_step_batch_np(self, states, throttles, brakes, steerings, dt, curvatures):
+        """Whole-array NumPy version of apply_physics_step_batch"""
+        g = self.GRAVITY
+        speed = states.v
+        mass = self.MASS + states.fuel * 0.7  # Fuel adds mass (~0.7 kg per unit)
+        moving = speed > 0.1
+        
+        # Gear selection
+        gear = states.gear
+        rpm = self._rpm_from_speed_batch(speed, gear)
+        gear = np.where(
+            speed < 5.0, 1,
+            np.where((rpm > 14000) & (gear < len(self.GEAR_RATIOS)), gear + 1,
+                     np.where((rpm < 8000) & (gear > 1) & (throttles > 0.5), gear - 1, gear)))
+        states.gear = gear
+        
+        # Power-limited acceleration
+        on_throttle = throttles > 0.01
+        speed_c = np.maximum(speed, 0.1)
+        rpm = self._rpm_from_speed_batch(speed_c, gear)
+        power_factor = np.sin(np.clip(rpm / self.max_rpm, 0, 1) * np.pi * 0.625)
+        power = self.POWER_MAX * power_factor * _ENGINE_MODE_MULT[states.engine_mode] * throttles
+        rolling_resistance = 0.02 * mass * g
+        accel = np.clip((power / speed_c - rolling_resistance) / mass, 0, 2.0 * g)
+        accel = np.where(on_throttle, accel, 0.0)
+        states.engine_rpm = np.where(on_throttle, rpm, float(self.idle_rpm))
+        
+        # Speed-dependent braking with front/rear distribution
+        speed_factor = np.sqrt(np.maximum(1 - speed / 100.0, 0.0))
+        brake_force_total = brakes * self.BRAKE_FRICTION * speed_factor * mass * g
+        weight_transfer = 0.1 * brake_force_total / mass
+        front_brake = brake_force_total * self.BRAKE_BIAS_FRONT * ((mass * g * 0.5 + weight_transfer) / (mass * g))
+        rear_brake = brake_force_total * (1 - self.BRAKE_BIAS_FRONT) * ((mass * g * 0.5 - weight_transfer) / (mass * g))
+        decel = np.clip((front_brake + rear_brake) / mass, 0, self.MAX_BRAKE_DECEL)
+        decel = np.where((brakes > 0.01) & moving, decel, 0.0)
+        
+        # Aerodynamic forces
+        q = 0.5 * self.AIR_DENSITY * self.FRONTAL_AREA * speed ** 2
+        drag_force = q * self.DRAG_COEFF * np.where(states.drs_active, 0.85, 1.0)
+        downforce = q * self.DOWNFORCE_COEFF
+        states.aero_downforce = downforce
+        
+        # Slip angle and front tire load after longitudinal weight transfer
+        slip_angle = np.where(moving, np.arctan(steerings * 0.1), 0.0)
+        front_load = self.MASS * g * 0.5 - (accel - decel) * 0.3
+        normal_load = front_load / 2  # Per front tire
+        
+        # Tire temperature
+        heat_gen = (0.01 * speed * np.abs(slip_angle) * (normal_load / (self.MASS * g / 4))
+                    * _COMPOUND_HEAT[states.tire_compound])
+        cooling = 0.05 * (states.tire_temp - states.track_temp)
+        states.tire_temp = np.clip(states.tire_temp + (heat_gen - cooling) * dt, states.track_temp, 150.0)
+        
+        # Net acceleration and new speed
+        net_accel = accel - decel - drag_force / mass
+        new_speed = np.maximum(0.0, speed + net_accel * dt)
+        
+        # Limit speed by cornering capability
+        cornering = curvatures > 1e-6
+        effective_grip = states.tire_grip * (1 + 0.3 * downforce / (self.MASS * g))
+        max_corner_speed = np.sqrt(effective_grip * g / np.where(cornering, curvatures, 1.0))
+        new_speed = np.where(cornering, np.minimum(new_speed, max_corner_speed), new_speed)
+        
+        states.v = new_speed
+        return new_speed
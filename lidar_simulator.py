@@ -5,6 +5,561 @@ Implements ray casting for track boundaries and car detection.
 
 import numpy as np
 import math
+from typing import NamedTuple
+
+from numba_compat import njit, NUMBA_AVAILABLE
+from physics_kernels import aot_kernel, AOT_AVAILABLE
+
+# Storage type for ray-cast geometry. float32 halves the memory traffic of the
+# NumPy broadcast path; the compiled loop is latency-bound and runs faster in
+# float64, so it keeps full precision.
+_KERNELS_COMPILED = NUMBA_AVAILABLE or AOT_AVAILABLE
+_GEOM_DTYPE = np.float64 if _KERNELS_COMPILED else np.float32
+
+
+@njit(cache=True, fastmath=True)
+def _cast_rays_segments(origin_x, origin_y, dirs_x, dirs_y, seg_xyxy, max_range):
+    """
+    Cast every ray against every line segment, keeping the nearest hit.
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        seg_xyxy: (N, 4) array of segments as [x0, y0, x1, y1]
+        max_range: Distance reported when a ray hits nothing
+    
+    Returns:
+        Array of distances (one per ray)
+    """
+    n_rays = dirs_x.shape[0]
+    n_seg = seg_xyxy.shape[0]
+    distances = np.empty(n_rays)
+    
+    for r in range(n_rays):
+        dx = dirs_x[r]
+        dy = dirs_y[r]
+        min_t = max_range
+        
+        for k in range(n_seg):
+            lx = seg_xyxy[k, 2] - seg_xyxy[k, 0]
+            ly = seg_xyxy[k, 3] - seg_xyxy[k, 1]
+            
+            # Parallel ray and segment never intersect
+            denom = dx * ly - dy * lx
+            if abs(denom) < 1e-10:
+                continue
+            
+            ox = seg_xyxy[k, 0] - origin_x
+            oy = seg_xyxy[k, 1] - origin_y
+            t = (ox * ly - oy * lx) / denom
+            if t < 0 or t >= min_t:
+                continue
+            
+            u = (ox * dy - oy * dx) / denom
+            if u < 0 or u > 1:
+                continue
+            
+            min_t = t
+        
+        distances[r] = min_t
+    
+    return distances
+
+
+def _cast_rays_segments_np(origin_x, origin_y, dirs_x, dirs_y, seg_xyxy, max_range,
+                           chunk_rays=64):
+    """
+    NumPy broadcast version of _cast_rays_segments, used when numba is
+    unavailable. Intersects blocks of rays against all segments at once.
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        seg_xyxy: (N, 4) array of segments as [x0, y0, x1, y1]
+        max_range: Distance reported when a ray hits nothing
+        chunk_rays: Rays per broadcast block (bounds the (rays, N) temporaries)
+    
+    Returns:
+        Array of distances (one per ray)
+    """
+    n_rays = dirs_x.shape[0]
+    distances = np.full(n_rays, max_range, dtype=np.float64)
+    if seg_xyxy.shape[0] == 0:
+        return distances
+    
+    lx = (seg_xyxy[:, 2] - seg_xyxy[:, 0])[None, :]
+    ly = (seg_xyxy[:, 3] - seg_xyxy[:, 1])[None, :]
+    ox = (seg_xyxy[:, 0] - origin_x)[None, :]
+    oy = (seg_xyxy[:, 1] - origin_y)[None, :]
+    num_t = ox * ly - oy * lx
+    
+    for r0 in range(0, n_rays, chunk_rays):
+        dx = dirs_x[r0:r0 + chunk_rays, None]
+        dy = dirs_y[r0:r0 + chunk_rays, None]
+        
+        denom = dx * ly - dy * lx
+        parallel = np.abs(denom) < 1e-10
+        denom = np.where(parallel, 1.0, denom)
+        t = num_t / denom
+        u = (ox * dy - oy * dx) / denom
+        
+        hit = ~parallel & (t >= 0) & (u >= 0) & (u <= 1)
+        t_hit = np.where(hit, t, np.inf).min(axis=1)
+        distances[r0:r0 + chunk_rays] = np.minimum(t_hit, max_range)
+    
+    return distances
+
+
+# Precompiled or JIT double loop when available, broadcasting otherwise
+_cast_rays = aot_kernel('cast_rays_segments') or (
+    _cast_rays_segments if NUMBA_AVAILABLE else _cast_rays_segments_np
+)
+
+
+@njit(cache=True, fastmath=True)
+def _cast_rays_circles(origin_x, origin_y, dirs_x, dirs_y, circ_xyr, distances):
+    """
+    Lower distances in place wherever a ray hits a circle first.
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        circ_xyr: (M, 3) array of circles as [cx, cy, radius]
+        distances: Current nearest distance per ray (updated in place)
+    """
+    for r in range(dirs_x.shape[0]):
+        dx = dirs_x[r]
+        dy = dirs_y[r]
+        
+        for k in range(circ_xyr.shape[0]):
+            ocx = circ_xyr[k, 0] - origin_x
+            ocy = circ_xyr[k, 1] - origin_y
+            r_sq = circ_xyr[k, 2] * circ_xyr[k, 2]
+            
+            # Project onto the ray; skip if the ray passes outside the circle
+            proj = ocx * dx + ocy * dy
+            dist_sq = ocx * ocx + ocy * ocy - proj * proj
+            if dist_sq > r_sq:
+                continue
+            
+            # Nearest intersection in front of the origin
+            half_chord = math.sqrt(r_sq - dist_sq)
+            t = proj - half_chord
+            if t <= 0:
+                t = proj + half_chord
+            if 0 < t < distances[r]:
+                distances[r] = t
+
+
+@njit(cache=True, fastmath=True)
+def _cast_rays_polygons(origin_x, origin_y, dirs_x, dirs_y, edges, poly_offsets,
+                        bearing_x, bearing_y, cos_half_width, distances):
+    """
+    Lower distances in place where a ray hits a polygon edge first. A
+    polygon's edges are only tested by rays inside its angular cone.
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        edges: (K, 4) polygon edges as [x0, y0, x1, y1], polygon after polygon
+        poly_offsets: (P + 1,) start index of each polygon in edges
+        bearing_x, bearing_y: Unit direction from the origin to each polygon
+        cos_half_width: Cosine of each polygon's angular half-width (-1 = all rays)
+        distances: Current nearest distance per ray (updated in place)
+    """
+    for r in range(dirs_x.shape[0]):
+        dx = dirs_x[r]
+        dy = dirs_y[r]
+        min_t = distances[r]
+        
+        for p in range(poly_offsets.shape[0] - 1):
+            # Cone test: ray must point within the polygon's angular extent
+            if dx * bearing_x[p] + dy * bearing_y[p] < cos_half_width[p]:
+                continue
+            
+            for k in range(poly_offsets[p], poly_offsets[p + 1]):
+                lx = edges[k, 2] - edges[k, 0]
+                ly = edges[k, 3] - edges[k, 1]
+                denom = dx * ly - dy * lx
+                if abs(denom) < 1e-10:
+                    continue
+                
+                ox = edges[k, 0] - origin_x
+                oy = edges[k, 1] - origin_y
+                t = (ox * ly - oy * lx) / denom
+                if t < 0 or t >= min_t:
+                    continue
+                
+                u = (ox * dy - oy * dx) / denom
+                if u < 0 or u > 1:
+                    continue
+                
+                min_t = t
+        
+        distances[r] = min_t
+
+
+@njit(cache=True, fastmath=True)
+def _cast_rays_grid(origin_x, origin_y, dirs_x, dirs_y, seg_xyxy, cell_start, cell_segs,
+                    grid_x0, grid_y0, cell_size, nx, ny, max_range):
+    """
+    Cast rays against segments binned in a uniform grid, walking each ray
+    cell by cell (Amanatides-Woo DDA) and testing only the segments in the
+    cells it crosses. The origin must lie inside the grid.
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        seg_xyxy: (N, 4) array of segments as [x0, y0, x1, y1]
+        cell_start: (nx * ny + 1,) start of each cell's entries in cell_segs
+        cell_segs: Segment indices, grouped by cell (row-major, x fastest)
+        grid_x0, grid_y0: Lower-left corner of the grid
+        cell_size: Cell edge length
+        nx, ny: Grid size in cells
+        max_range: Distance reported when a ray hits nothing
+    
+    Returns:
+        Array of distances (one per ray)
+    """
+    n_rays = dirs_x.shape[0]
+    distances = np.empty(n_rays)
+    
+    # Origin in cell units
+    fx = (origin_x - grid_x0) / cell_size
+    fy = (origin_y - grid_y0) / cell_size
+    start_cx = int(math.floor(fx))
+    start_cy = int(math.floor(fy))
+    
+    for r in range(n_rays):
+        dx = dirs_x[r]
+        dy = dirs_y[r]
+        cx = start_cx
+        cy = start_cy
+        
+        # Ray distance to the next x / y cell boundary, and between boundaries
+        # (large finite values stand in for infinity under fastmath)
+        if dx > 1e-12:
+            step_x = 1
+            t_delta_x = cell_size / dx
+            t_max_x = (cx + 1 - fx) * t_delta_x
+        elif dx < -1e-12:
+            step_x = -1
+            t_delta_x = -cell_size / dx
+            t_max_x = (fx - cx) * t_delta_x
+        else:
+            step_x = 0
+            t_delta_x = 1e30
+            t_max_x = 1e30
+        if dy > 1e-12:
+            step_y = 1
+            t_delta_y = cell_size / dy
+            t_max_y = (cy + 1 - fy) * t_delta_y
+        elif dy < -1e-12:
+            step_y = -1
+            t_delta_y = -cell_size / dy
+            t_max_y = (fy - cy) * t_delta_y
+        else:
+            step_y = 0
+            t_delta_y = 1e30
+            t_max_y = 1e30
+        
+        min_t = max_range
+        while 0 <= cx < nx and 0 <= cy < ny:
+            cell = cy * nx + cx
+            for j in range(cell_start[cell], cell_start[cell + 1]):
+                k = cell_segs[j]
+                lx = seg_xyxy[k, 2] - seg_xyxy[k, 0]
+                ly = seg_xyxy[k, 3] - seg_xyxy[k, 1]
+                denom = dx * ly - dy * lx
+                if abs(denom) < 1e-10:
+                    continue
+                
+                ox = seg_xyxy[k, 0] - origin_x
+                oy = seg_xyxy[k, 1] - origin_y
+                t = (ox * ly - oy * lx) / denom
+                if t < 0 or t >= min_t:
+                    continue
+                
+                u = (ox * dy - oy * dx) / denom
+                if u < 0 or u > 1:
+                    continue
+                
+                min_t = t
+            
+            # Step into the next cell; stop once it starts beyond the nearest hit
+            if t_max_x < t_max_y:
+                t_cell = t_max_x
+                t_max_x += t_delta_x
+                cx += step_x
+            else:
+                t_cell = t_max_y
+                t_max_y += t_delta_y
+                cy += step_y
+            if t_cell >= min_t:
+                break
+        
+        distances[r] = min_t
+    
+    return distances
+
+
+class SegmentGrid(NamedTuple):
+    """Uniform grid of segment indices in CSR layout (see build_segment_grid)"""
+    x0: float
+    y0: float
+    cell_size: float
+    nx: int
+    ny: int
+    cell_start: np.ndarray
+    cell_segs: np.ndarray
+
+
+def build_segment_grid(seg_xyxy, cell_size):
+    """
+    Bin segments into every grid cell their bounding box overlaps.
+    
+    Args:
+        seg_xyxy: (N, 4) array of segments as [x0, y0, x1, y1]
+        cell_size: Cell edge length
+    
+    Returns:
+        SegmentGrid covering the segments plus a one-cell margin
+    """
+    xs = seg_xyxy[:, [0, 2]]
+    ys = seg_xyxy[:, [1, 3]]
+    x0 = float(xs.min()) - cell_size
+    y0 = float(ys.min()) - cell_size
+    nx = int((xs.max() - x0) // cell_size) + 2
+    ny = int((ys.max() - y0) // cell_size) + 2
+    
+    # Cell ranges of each segment's bounding box
+    ix0 = ((xs.min(axis=1) - x0) // cell_size).astype(np.int64)
+    ix1 = ((xs.max(axis=1) - x0) // cell_size).astype(np.int64)
+    iy0 = ((ys.min(axis=1) - y0) // cell_size).astype(np.int64)
+    iy1 = ((ys.max(axis=1) - y0) // cell_size).astype(np.int64)
+    span_x = ix1 - ix0 + 1
+    counts = span_x * (iy1 - iy0 + 1)
+    
+    # One (cell, segment) pair per overlapped cell
+    seg_index = np.repeat(np.arange(len(seg_xyxy)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell_x = ix0[seg_index] + local % span_x[seg_index]
+    cell_y = iy0[seg_index] + local // span_x[seg_index]
+    cells = cell_y * nx + cell_x
+    
+    order = np.argsort(cells, kind='stable')
+    cell_start = np.zeros(nx * ny + 1, dtype=np.int64)
+    cell_start[1:] = np.cumsum(np.bincount(cells, minlength=nx * ny))
+    return SegmentGrid(x0, y0, float(cell_size), nx, ny, cell_start, seg_index[order])
+
+
+def cast_rays_grid(origin_x, origin_y, dirs_x, dirs_y, seg_xyxy, grid, max_range):
+    """
+    Nearest segment hit per ray using a SegmentGrid, or None when no
+    compiled kernel is available or the origin lies outside the grid.
+    """
+    if _cast_rays_grid_compiled is None:
+        return None
+    cx = (origin_x - grid.x0) // grid.cell_size
+    cy = (origin_y - grid.y0) // grid.cell_size
+    if not (0 <= cx < grid.nx and 0 <= cy < grid.ny):
+        return None
+    
+    return _cast_rays_grid_compiled(
+        float(origin_x), float(origin_y),
+        np.asarray(dirs_x, dtype=np.float64), np.asarray(dirs_y, dtype=np.float64),
+        seg_xyxy, grid.cell_start, grid.cell_segs,
+        grid.x0, grid.y0, grid.cell_size, grid.nx, grid.ny, float(max_range)
+    )
+
+
+# Precompiled polygon/circle kernels take over from JIT when built
+_cast_rays_polygons_compiled = aot_kernel('cast_rays_polygons') or (
+    _cast_rays_polygons if NUMBA_AVAILABLE else None
+)
+_cast_rays_circles_compiled = aot_kernel('cast_rays_circles') or _cast_rays_circles
+_cast_rays_grid_compiled = aot_kernel('cast_rays_grid') or (
+    _cast_rays_grid if NUMBA_AVAILABLE else None
+)
+
+
+def _polygon_cones(origin_x, origin_y, poly_verts, poly_offsets, margin=0.1):
+    """
+    Bearing and angular half-width of each polygon's bounding circle as
+    seen from the ray origin.
+    
+    Returns:
+        bearing_x, bearing_y, cos_half_width arrays (one entry per polygon)
+    """
+    counts = np.diff(poly_offsets)
+    poly_index = np.repeat(np.arange(len(counts)), counts)
+    
+    # Bounding circle: vertex centroid and farthest vertex
+    cx = np.bincount(poly_index, poly_verts[:, 0], len(counts)) / counts
+    cy = np.bincount(poly_index, poly_verts[:, 1], len(counts)) / counts
+    vert_r = np.hypot(poly_verts[:, 0] - cx[poly_index], poly_verts[:, 1] - cy[poly_index])
+    radius = np.zeros(len(counts))
+    np.maximum.at(radius, poly_index, vert_r)
+    radius += margin
+    
+    dx = cx - origin_x
+    dy = cy - origin_y
+    dist = np.hypot(dx, dy)
+    inside = dist <= radius
+    # Origin inside the bounding circle: zero bearing so every ray passes the cone test
+    inv_dist = np.where(inside, 0.0, 1.0 / np.maximum(dist, 1e-12))
+    
+    sin_hw = np.minimum(radius * inv_dist, 1.0)
+    cos_half_width = np.where(inside, -1.0, np.sqrt(1.0 - sin_hw * sin_hw))
+    return dx * inv_dist, dy * inv_dist, cos_half_width
+
+
+def _polygon_edges(poly_verts, poly_offsets):
+    """
+    Expand closed polygons into their edge segments.
+    
+    Args:
+        poly_verts: (K, 2) array of all polygon vertices, polygon after polygon
+        poly_offsets: (P + 1,) start index of each polygon in poly_verts
+    
+    Returns:
+        (K, 4) array of edges as [x0, y0, x1, y1]
+    """
+    n_verts = poly_verts.shape[0]
+    nxt = np.arange(1, n_verts + 1)
+    # The last vertex of each polygon connects back to its first vertex
+    nxt[poly_offsets[1:] - 1] = poly_offsets[:-1]
+    
+    edges = np.empty((n_verts, 4), dtype=poly_verts.dtype)
+    edges[:, :2] = poly_verts
+    edges[:, 2:] = poly_verts[nxt]
+    return edges
+
+
+def cast_rays_soa(origin_x, origin_y, dirs_x, dirs_y, max_range,
+                  seg_xyxy=None, circ_xyr=None, poly_verts=None, poly_offsets=None):
+    """
+    Cast rays against typed obstacle arrays (segments, circles, polygons).
+    
+    Args:
+        origin_x, origin_y: Ray origin
+        dirs_x, dirs_y: Unit ray directions, one entry per ray
+        max_range: Distance reported when a ray hits nothing
+        seg_xyxy: (N, 4) segments as [x0, y0, x1, y1] (optional)
+        circ_xyr: (M, 3) circles as [cx, cy, radius] (optional)
+        poly_verts: (K, 2) polygon vertices (optional, with poly_offsets)
+        poly_offsets: (P + 1,) polygon start indices into poly_verts
+    
+    Returns:
+        Array of distances (one per ray, float64)
+    """
+    # Geometry in _GEOM_DTYPE (metres within a 10 m range); distances stay float64
+    origin_x = _GEOM_DTYPE(origin_x)
+    origin_y = _GEOM_DTYPE(origin_y)
+    dirs_x = np.asarray(dirs_x, dtype=_GEOM_DTYPE)
+    dirs_y = np.asarray(dirs_y, dtype=_GEOM_DTYPE)
+    if poly_verts is not None:
+        poly_verts = np.asarray(poly_verts, dtype=_GEOM_DTYPE)
+    
+    max_range = float(max_range)
+    distances = np.full(dirs_x.shape[0], max_range)
+    
+    if seg_xyxy is not None and len(seg_xyxy) > 0:
+        distances = _cast_rays(origin_x, origin_y, dirs_x, dirs_y, seg_xyxy, max_range)
+    
+    if poly_offsets is not None and len(poly_offsets) > 1:
+        edges = _polygon_edges(poly_verts, poly_offsets)
+        if _cast_rays_polygons_compiled is not None:
+            bearing_x, bearing_y, cos_half_width = _polygon_cones(
+                origin_x, origin_y, poly_verts, poly_offsets
+            )
+            _cast_rays_polygons_compiled(origin_x, origin_y, dirs_x, dirs_y, edges,
+                                         np.asarray(poly_offsets, dtype=np.int64),
+                                         bearing_x, bearing_y, cos_half_width, distances)
+        else:
+            np.minimum(distances, _cast_rays(origin_x, origin_y, dirs_x, dirs_y, edges, max_range),
+                       out=distances)
+    
+    if circ_xyr is not None and len(circ_xyr) > 0:
+        _cast_rays_circles_compiled(origin_x, origin_y, dirs_x, dirs_y, circ_xyr, distances)
+    
+    return distances
+
+
+def boundary_segments(left_boundary, right_boundary):
+    """
+    Closed-loop track boundary segments as one typed array.
+    
+    Args:
+        left_boundary, right_boundary: (n, 2) arrays of boundary points
+    
+    Returns:
+        (2n, 4) _GEOM_DTYPE array of segments as [x0, y0, x1, y1], left boundary first
+    """
+    n = len(left_boundary)
+    seg_xyxy = np.empty((2 * n, 4), dtype=_GEOM_DTYPE)
+    seg_xyxy[:n, :2] = left_boundary
+    seg_xyxy[:n, 2:] = np.roll(left_boundary, -1, axis=0)
+    seg_xyxy[n:, :2] = right_boundary
+    seg_xyxy[n:, 2:] = np.roll(right_boundary, -1, axis=0)
+    return seg_xyxy
+
+
+def obstacles_to_soa(obstacles):
+    """
+    Convert a list of obstacle dicts into typed obstacle arrays.
+    
+    Args:
+        obstacles: List of obstacle dicts with 'type' ('line', 'circle' or
+            'polygon') and geometry
+    
+    Returns:
+        _GEOM_DTYPE seg_xyxy (N, 4), circ_xyr (M, 3), poly_verts (K, 2) and
+        int64 poly_offsets (P + 1,)
+    """
+    segments = []
+    circles = []
+    polygons = []
+    
+    for obstacle in obstacles:
+        if obstacle['type'] == 'line':
+            segments.append(np.concatenate([obstacle['start'], obstacle['end']]))
+        elif obstacle['type'] == 'circle':
+            circles.append([obstacle['center'][0], obstacle['center'][1], obstacle['radius']])
+        elif obstacle['type'] == 'polygon':
+            polygons.append(np.asarray(obstacle['vertices'], dtype=_GEOM_DTYPE))
+    
+    seg_xyxy = np.array(segments, dtype=_GEOM_DTYPE).reshape(-1, 4)
+    circ_xyr = np.array(circles, dtype=_GEOM_DTYPE).reshape(-1, 3)
+    poly_offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+    poly_offsets[1:] = np.cumsum([len(p) for p in polygons])
+    poly_verts = np.concatenate(polygons) if polygons else np.empty((0, 2), dtype=_GEOM_DTYPE)
+    
+    return seg_xyxy, circ_xyr, poly_verts, poly_offsets
+
+
+def compute_car_poses(track_spline, cars):
+    """
+    Track poses of many cars from one batched spline evaluation.
+    
+    Args:
+        track_spline: Track spline dict with 's_to_u' and 'pos'
+        cars: Sequence of CarState objects
+    
+    Returns:
+        (n, 3) array of [x, y, heading] rows, one per car
+    """
+    ss = np.array([c.s for c in cars], dtype=np.float64)
+    poses = np.empty((len(ss), 3))
+    if len(ss) == 0:
+        return poses
+    
+    # Heading from the position 1 m further along the track
+    pos = track_spline['pos'](track_spline['s_to_u'](ss))
+    pos2 = track_spline['pos'](track_spline['s_to_u'](ss + 1.0))
+    poses[:, :2] = pos
+    poses[:, 2] = np.arctan2(pos2[:, 1] - pos[:, 1], pos2[:, 0] - pos[:, 0])
+    return poses
 
 
 class LidarSimulator:
@@ -24,6 +579,16 @@ class LidarSimulator:
         self.track_width = track_width
         self.angles = np.linspace(0, 2 * np.pi, num_rays, endpoint=False)
         
+        # Bounding radius of a car box (default 5.5 m x 2.0 m) plus margin
+        self._car_radius = math.hypot(5.5 / 2, 2.0 / 2) + 0.1
+        
+        # Ray directions in the car frame; rotated by the heading per scan
+        self._cos = np.cos(self.angles).astype(_GEOM_DTYPE)
+        self._sin = np.sin(self.angles).astype(_GEOM_DTYPE)
+        
+        # Static boundary segments per track: id(source) -> (source, seg_xyxy)
+        self._boundary_cache = {}
+        
     def generate_track_boundaries(self, track_spline, n_points=2000):
         """
         Generate left and right track boundaries from centerline spline.
@@ -38,49 +603,18 @@ class LidarSimulator:
         ss = np.linspace(0, 1, n_points)
         centerline_points = track_spline['pos'](ss)
         
-        left_boundary = []
-        right_boundary = []
+        # Direction to the next point (the last point wraps to the first)
+        d = np.roll(centerline_points, -1, axis=0) - centerline_points
+        length = np.hypot(d[:, 0], d[:, 1])
         
-        for i in range(len(centerline_points)):
-            # Get current point
-            p = centerline_points[i]
-            
-            # Get next point for direction
-            if i < len(centerline_points) - 1:
-                p_next = centerline_points[i + 1]
-            else:
-                p_next = centerline_points[0]
-            
-            # Calculate direction vector
-            dx = p_next[0] - p[0]
-            dy = p_next[1] - p[1]
-            length = np.sqrt(dx**2 + dy**2)
-            
-            if length > 1e-6:
-                # Normalize
-                dx /= length
-                dy /= length
-                
-                # Perpendicular vector (rotate 90°)
-                perp_x = -dy
-                perp_y = dx
-                
-                # Offset by half track width
-                offset = self.track_width / 2
-                
-                left_boundary.append([
-                    p[0] + perp_x * offset,
-                    p[1] + perp_y * offset
-                ])
-                right_boundary.append([
-                    p[0] - perp_x * offset,
-                    p[1] - perp_y * offset
-                ])
-            else:
-                left_boundary.append([p[0], p[1]])
-                right_boundary.append([p[0], p[1]])
+        # Perpendicular unit vector (rotate 90°); degenerate points stay on the centerline
+        inv_length = np.where(length > 1e-6, 1.0 / np.maximum(length, 1e-12), 0.0)
+        perp = np.stack([-d[:, 1], d[:, 0]], axis=1) * inv_length[:, None]
+        
+        # Offset by half track width
+        offset = perp * (self.track_width / 2)
         
-        return np.array(left_boundary), np.array(right_boundary)
+        return centerline_points + offset, centerline_points - offset
     
     def ray_line_intersection(self, ray_origin, ray_dir, line_start, line_end):
         """
@@ -90,17 +624,21 @@ class LidarSimulator:
         # Ray: origin + t * dir
         # Line: start + u * (end - start)
         
-        line_dir = line_end - line_start
+        # Scalar components: no ufunc dispatch on 2-vectors
+        dx, dy = float(ray_dir[0]), float(ray_dir[1])
+        lx = float(line_end[0]) - float(line_start[0])
+        ly = float(line_end[1]) - float(line_start[1])
         
         # Check if parallel
-        denom = ray_dir[0] * line_dir[1] - ray_dir[1] * line_dir[0]
+        denom = dx * ly - dy * lx
         if abs(denom) < 1e-10:
             return None
         
         # Calculate intersection parameters
-        diff = line_start - ray_origin
-        t = (diff[0] * line_dir[1] - diff[1] * line_dir[0]) / denom
-        u = (diff[0] * ray_dir[1] - diff[1] * ray_dir[0]) / denom
+        ox = float(line_start[0]) - float(ray_origin[0])
+        oy = float(line_start[1]) - float(ray_origin[1])
+        t = (ox * ly - oy * lx) / denom
+        u = (ox * dy - oy * dx) / denom
         
         # Check if intersection is valid
         if t < 0 or u < 0 or u > 1:
@@ -113,21 +651,24 @@ class LidarSimulator:
         Check if ray intersects circle (for car detection).
         Returns distance to intersection or None.
         """
-        # Vector from ray origin to circle center
-        oc = circle_center - ray_origin
+        # Vector from ray origin to circle center (scalar components)
+        ocx = float(circle_center[0]) - float(ray_origin[0])
+        ocy = float(circle_center[1]) - float(ray_origin[1])
+        dx, dy = float(ray_dir[0]), float(ray_dir[1])
         
         # Project oc onto ray direction
-        proj = np.dot(oc, ray_dir)
+        proj = ocx * dx + ocy * dy
         
         # Distance from circle center to ray
-        dist_sq = np.dot(oc, oc) - proj * proj
+        dist_sq = ocx * ocx + ocy * ocy - proj * proj
         
         # Check if ray misses circle
-        if dist_sq > circle_radius ** 2:
+        r_sq = circle_radius * circle_radius
+        if dist_sq > r_sq:
             return None
         
         # Calculate intersection point
-        half_chord = np.sqrt(circle_radius ** 2 - dist_sq)
+        half_chord = math.sqrt(r_sq - dist_sq)
         t1 = proj - half_chord
         t2 = proj + half_chord
         
@@ -171,6 +712,23 @@ class LidarSimulator:
         Returns:
             Array of 4 corner vertices
         """
+        return self.get_car_bboxes_batch(
+            np.array([car_x]), np.array([car_y]), np.array([car_angle]), car_length, car_width
+        )[0]
+    
+    def get_car_bboxes_batch(self, xs, ys, angles, car_length=5.5, car_width=2.0):
+        """
+        Get bounding box vertices for many cars at once.
+        
+        Args:
+            xs, ys: Arrays of car positions
+            angles: Array of car heading angles
+            car_length: Car length in meters
+            car_width: Car width in meters
+        
+        Returns:
+            (n, 4, 2) array of corner vertices
+        """
         # Half dimensions
         half_len = car_length / 2
         half_wid = car_width / 2
@@ -183,18 +741,12 @@ class LidarSimulator:
             [half_len, -half_wid]
         ])
         
-        # Rotate and translate
-        cos_a = np.cos(car_angle)
-        sin_a = np.sin(car_angle)
-        
-        rotation_matrix = np.array([
-            [cos_a, -sin_a],
-            [sin_a, cos_a]
-        ])
-        
-        corners_world = corners_local @ rotation_matrix.T
-        corners_world[:, 0] += car_x
-        corners_world[:, 1] += car_y
+        # Rotate and translate every car's corners
+        cos_a = np.cos(angles)[:, None]
+        sin_a = np.sin(angles)[:, None]
+        corners_world = np.empty((len(xs), 4, 2))
+        corners_world[:, :, 0] = corners_local[:, 0] * cos_a - corners_local[:, 1] * sin_a + np.asarray(xs)[:, None]
+        corners_world[:, :, 1] = corners_local[:, 0] * sin_a + corners_local[:, 1] * cos_a + np.asarray(ys)[:, None]
         
         return corners_world
     
@@ -210,35 +762,90 @@ class LidarSimulator:
         Returns:
             Distance to nearest obstacle (or max_range if none)
         """
-        ray_dir = np.array([np.cos(ray_angle), np.sin(ray_angle)])
-        min_dist = self.max_range
+        seg_xyxy, circ_xyr, poly_verts, poly_offsets = obstacles_to_soa(obstacles)
+        distances = cast_rays_soa(
+            float(ray_origin[0]), float(ray_origin[1]),
+            np.array([math.cos(ray_angle)]), np.array([math.sin(ray_angle)]),
+            self.max_range, seg_xyxy, circ_xyr, poly_verts, poly_offsets
+        )
+        return float(distances[0])
+    
+    def get_boundary_segments(self, track_spline, track_boundaries=None):
+        """
+        Cached closed-loop boundary segments for a track.
         
-        for obstacle in obstacles:
-            dist = None
-            
-            if obstacle['type'] == 'line':
-                dist = self.ray_line_intersection(
-                    ray_origin, ray_dir,
-                    obstacle['start'], obstacle['end']
-                )
-            elif obstacle['type'] == 'circle':
-                dist = self.ray_circle_intersection(
-                    ray_origin, ray_dir,
-                    obstacle['center'], obstacle['radius']
-                )
-            elif obstacle['type'] == 'polygon':
-                dist = self.ray_polygon_intersection(
-                    ray_origin, ray_dir,
-                    obstacle['vertices']
-                )
-            
-            if dist is not None and dist < min_dist:
-                min_dist = dist
+        Args:
+            track_spline: Track spline dict
+            track_boundaries: Pre-computed boundaries (optional)
         
-        return min_dist
+        Returns:
+            (N, 4) array of boundary segments as [x0, y0, x1, y1]
+        """
+        return self._get_boundary_entry(track_spline, track_boundaries)[1]
+    
+    def _get_boundary_entry(self, track_spline, track_boundaries=None):
+        """Cache entry (source, seg_xyxy, s_cum, grid) for a track's boundaries."""
+        # The cache holds a reference to its source, so its id can't be reused
+        source = track_boundaries if track_boundaries is not None else track_spline
+        entry = self._boundary_cache.get(id(source))
+        if entry is not None and entry[0] is source:
+            return entry
+        
+        # Generate track boundaries if not provided
+        if track_boundaries is None:
+            left_boundary, right_boundary = self.generate_track_boundaries(track_spline)
+        else:
+            left_boundary, right_boundary = track_boundaries
+        
+        seg_xyxy = boundary_segments(left_boundary, right_boundary)
+        
+        # Cumulative centerline arc length at each boundary point, closing the loop
+        centerline = (np.asarray(left_boundary) + np.asarray(right_boundary)) / 2
+        step = np.hypot(*(np.roll(centerline, -1, axis=0) - centerline).T)
+        s_cum = np.concatenate([[0.0], np.cumsum(step)])
+        
+        # Segment grid for the compiled DDA walk (cells a quarter of max_range)
+        grid = build_segment_grid(seg_xyxy, self.max_range / 4) if _cast_rays_grid_compiled else None
+        
+        entry = (source, seg_xyxy, s_cum, grid)
+        self._boundary_cache[id(source)] = entry
+        return entry
+    
+    def get_boundary_window(self, track_spline, car_s, track_boundaries=None):
+        """
+        Boundary segments within reach of a car, selected by arc length.
+        
+        A ray stays inside the track until its first hit, so only boundary
+        segments within a few max_range of the car's centerline position
+        can be hit. The window is padded for the inside of tight corners,
+        where boundary distances are shorter than centerline distances.
+        
+        Args:
+            track_spline: Track spline dict with 'total_length'
+            car_s: Car arc length position (may exceed one lap)
+            track_boundaries: Pre-computed boundaries (optional)
+        
+        Returns:
+            (M, 4) array of boundary segments as [x0, y0, x1, y1]
+        """
+        _, seg_xyxy, s_cum, _ = self._get_boundary_entry(track_spline, track_boundaries)
+        n = len(s_cum) - 1
+        loop_length = s_cum[-1]
+        
+        # Car position on the boundary polyline's own arc length scale
+        s = (car_s % track_spline['total_length']) / track_spline['total_length'] * loop_length
+        half_window = 2 * self.max_range + self.track_width
+        if 2 * half_window >= loop_length:
+            return seg_xyxy
+        
+        # Segment i runs from point i to i + 1; wrap indices around the loop
+        i0 = np.searchsorted(s_cum, s - half_window + (loop_length if s < half_window else 0.0)) - 1
+        i1 = np.searchsorted(s_cum, s + half_window - (loop_length if s + half_window > loop_length else 0.0))
+        rows = np.arange(i0, i1 + (n if i1 < i0 else 0) + 1) % n
+        return seg_xyxy[np.concatenate([rows, rows + n])]
     
     def generate_lidar_scan(self, car_x, car_y, car_angle, track_spline, other_cars, 
-                           track_boundaries=None):
+                           track_boundaries=None, car_s=None):
         """
         Generate complete LiDAR scan for a car.
         
@@ -246,80 +853,65 @@ class LidarSimulator:
             car_x, car_y: Car position
             car_angle: Car heading angle
             track_spline: Track spline dict
-            other_cars: List of other car dicts with 'x', 'y', 'angle'
+            other_cars: List of other car dicts with 'x', 'y', 'angle', or an
+                (m, 3) array of [x, y, heading] rows
             track_boundaries: Pre-computed boundaries (optional)
+            car_s: Car arc length position; limits the boundary segments
+                tested to a window around the car (optional)
         
         Returns:
             Array of distances (one per ray)
         """
-        ray_origin = np.array([car_x, car_y])
-        
-        # Generate track boundaries if not provided
-        if track_boundaries is None:
-            left_boundary, right_boundary = self.generate_track_boundaries(track_spline)
+        # Rotate the cached ray directions into world coordinates
+        c = _GEOM_DTYPE(math.cos(car_angle))
+        s = _GEOM_DTYPE(math.sin(car_angle))
+        dirs_x = c * self._cos - s * self._sin
+        dirs_y = s * self._cos + c * self._sin
+        
+        # Static track boundaries: grid walk when compiled, else the arc-length
+        # window around the car, else every segment
+        _, seg_all, _, grid = self._get_boundary_entry(track_spline, track_boundaries)
+        boundary_distances = None
+        if grid is not None:
+            boundary_distances = cast_rays_grid(car_x, car_y, dirs_x, dirs_y, seg_all, grid,
+                                                self.max_range)
+        if boundary_distances is not None:
+            seg_xyxy = None
+        elif car_s is not None:
+            seg_xyxy = self.get_boundary_window(track_spline, car_s, track_boundaries)
         else:
-            left_boundary, right_boundary = track_boundaries
+            seg_xyxy = seg_all
         
-        # Build obstacle list
-        obstacles = []
-        
-        # Add track boundaries as line segments
-        for i in range(len(left_boundary) - 1):
-            obstacles.append({
-                'type': 'line',
-                'start': left_boundary[i],
-                'end': left_boundary[i + 1]
-            })
-            obstacles.append({
-                'type': 'line',
-                'start': right_boundary[i],
-                'end': right_boundary[i + 1]
-            })
-        
-        # Close the loop
-        if len(left_boundary) > 0:
-            obstacles.append({
-                'type': 'line',
-                'start': left_boundary[-1],
-                'end': left_boundary[0]
-            })
-            obstacles.append({
-                'type': 'line',
-                'start': right_boundary[-1],
-                'end': right_boundary[0]
-            })
-        
-        # Add other cars as bounding boxes
-        for other_car in other_cars:
-            if other_car['x'] == car_x and other_car['y'] == car_y:
-                continue  # Skip self
-            
-            # Check if car is within range
-            dx = other_car['x'] - car_x
-            dy = other_car['y'] - car_y
-            dist = np.sqrt(dx**2 + dy**2)
+        # Other cars whose box can reach into max_range, as bounding box polygons
+        if len(other_cars):
+            if isinstance(other_cars, np.ndarray):
+                xs, ys, angles = other_cars[:, 0], other_cars[:, 1], other_cars[:, 2]
+            else:
+                xs = np.array([c['x'] for c in other_cars], dtype=np.float64)
+                ys = np.array([c['y'] for c in other_cars], dtype=np.float64)
+                angles = np.array([c['angle'] for c in other_cars], dtype=np.float64)
             
-            if dist < self.max_range * 1.5:  # Slightly larger than max_range for safety
-                bbox = self.get_car_bounding_box(
-                    other_car['x'], other_car['y'], other_car['angle']
-                )
-                obstacles.append({
-                    'type': 'polygon',
-                    'vertices': bbox
-                })
+            # Skip self; a box can only be hit if its bounding circle is within range
+            dist = np.hypot(xs - car_x, ys - car_y)
+            near = ~((xs == car_x) & (ys == car_y)) & (dist < self.max_range + self._car_radius)
+            boxes = self.get_car_bboxes_batch(xs[near], ys[near], angles[near])
+        else:
+            boxes = np.empty((0, 4, 2))
         
-        # Cast all rays
-        distances = []
-        for angle_offset in self.angles:
-            # Ray angle in world coordinates
-            ray_angle = car_angle + angle_offset
-            
-            dist = self.cast_ray(ray_origin, ray_angle, obstacles)
-            distances.append(dist)
+        poly_verts = boxes.reshape(-1, 2).astype(_GEOM_DTYPE)
+        poly_offsets = np.arange(0, 4 * len(boxes) + 1, 4)
         
-        return np.array(distances)
+        # Cast all rays
+        distances = cast_rays_soa(
+            float(car_x), float(car_y), dirs_x, dirs_y,
+            self.max_range, seg_xyxy, poly_verts=poly_verts, poly_offsets=poly_offsets
+        )
+        if boundary_distances is not None:
+            np.minimum(distances, boundary_distances, out=distances)
+        return distances
     
-    def generate_lidar_for_car(self, car, track_spline, all_cars, track_boundaries=None):
+    def generate_lidar_for_car(self, car, track_spline, all_cars, track_boundaries=None,
+                               car_poses=None):
         """
         Convenience method to generate LiDAR for a CarState object.
         
@@ -328,42 +920,24 @@ class LidarSimulator:
             track_spline: Track spline dict
             all_cars: List of all CarState objects
             track_boundaries: Pre-computed boundaries (optional)
+            car_poses: compute_car_poses(track_spline, all_cars), to share one
+                batched spline evaluation across every car's scan (optional)
         
         Returns:
             LiDAR scan array
         """
-        # Get car position from track
-        u = track_spline['s_to_u'](car.s)
-        pos = track_spline['pos'](u)[0]
-        car_x, car_y = pos[0], pos[1]
-        
-        # Calculate heading
-        u2 = track_spline['s_to_u'](car.s + 1.0)
-        pos2 = track_spline['pos'](u2)[0]
-        car_angle = np.arctan2(pos2[1] - pos[1], pos2[0] - pos[0])
-        
-        # Prepare other cars list
-        other_cars = []
-        for other in all_cars:
-            if other is car:
-                continue
-            
-            u_other = track_spline['s_to_u'](other.s)
-            pos_other = track_spline['pos'](u_other)[0]
-            
-            u2_other = track_spline['s_to_u'](other.s + 1.0)
-            pos2_other = track_spline['pos'](u2_other)[0]
-            angle_other = np.arctan2(pos2_other[1] - pos_other[1], 
-                                     pos2_other[0] - pos_other[0])
-            
-            other_cars.append({
-                'x': pos_other[0],
-                'y': pos_other[1],
-                'angle': angle_other
-            })
+        if car_poses is None:
+            car_poses = compute_car_poses(track_spline, all_cars)
+        
+        # Split the ego pose from the other cars' poses
+        is_other = np.array([other is not car for other in all_cars], dtype=bool)
+        if is_other.all():
+            car_x, car_y, car_angle = compute_car_poses(track_spline, [car])[0]
+        else:
+            car_x, car_y, car_angle = car_poses[np.argmin(is_other)]
         
         # Generate scan
         return self.generate_lidar_scan(
-            car_x, car_y, car_angle, track_spline, other_cars, track_boundaries
+            car_x, car_y, car_angle, track_spline, car_poses[is_other], track_boundaries,
+            car_s=car.s
         )
-
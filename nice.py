@@ -105,10 +105,23 @@ def build_spline(waypoints, n_points=4000):
         u = np.interp(arc, s_arclen, ss)
         return u
 
+    # Dense centerline lookup tables (~3m spacing) so per-tick queries by arc
+    # length become O(1) index reads instead of spline evaluations
+    n_lut = max(int(total_length / 3.0), 2)
+    lut_ds = total_length / n_lut
+    u_lut = s_to_u(np.arange(n_lut) * lut_ds)
+    pos_lut = pos(u_lut)
+    curv_lut = curv(u_lut)
+    tang_lut = np.roll(pos_lut, -1, axis=0) - pos_lut
+    tang_len = np.hypot(tang_lut[:, 0], tang_lut[:, 1])
+    inv_len = np.where(tang_len > 1e-6, 1.0 / np.maximum(tang_len, 1e-12), 0.0)
+    tang_lut *= inv_len[:, None]
+
     return {
         'csx': csx, 'csy': csy, 'pos': pos, 'curv': curv,
         's_arclen': s_arclen, 'total_length': total_length, 's_to_u': s_to_u,
-        'ss': ss
+        'ss': ss, 'pos_lut': pos_lut, 'curv_lut': curv_lut, 'tang_lut': tang_lut,
+        'ds': lut_ds
     }
 
 # -------------------- Simulation models --------------------
@@ -134,6 +147,11 @@ TYRE_HEAT_FACTORS = {
     'WET': 0.9      # Less heat generation
 }
 
+# Integer codes stored on CarState for the physics engine (same order as
+# enhanced_physics COMPOUND_* and ENGINE_* codes)
+TYRE_CODES = {'SOFT': 0, 'MEDIUM': 1, 'HARD': 2, 'WET': 3}
+ENGINE_MODE_CODES = {'conservative': 0, 'normal': 1, 'aggressive': 2}
+
 PIT_TIME = 22.0  # seconds lost in a pitstop
 
 class CarState:
@@ -143,6 +161,7 @@ class CarState:
         self.driver_skill = driver_skill  # 0-1
         self.aggression = aggression  # 0-1
         self.tyre = 'MEDIUM'
+        self.tyre_code = TYRE_CODES['MEDIUM']
         self.wear = 0.0
         self.fuel = 100.0  # arbitrary units
         self.laptime = 0.0
@@ -163,12 +182,14 @@ class CarState:
         self.throttle = 0.0  # Throttle input (0-1)
         self.brake_pressure = 0.0  # Brake input (0-1)
         self.tire_temp = 100.0  # Tire temperature (°C)
+        self.tire_grip = 1.0  # Grip coefficient from tyre wear/temperature
         self.tire_pressure = 1.0  # Tire pressure (bar)
         self.aero_downforce = 0.0  # Downforce (N)
         self.drag_coeff = 0.75  # Drag coefficient
         self.yaw_rate = 0.0  # Yaw rate (rad/s)
         self.slip_angle = 0.0  # Slip angle (rad)
         self.engine_mode = 'normal'  # 'conservative', 'normal', 'aggressive'
+        self.engine_mode_code = ENGINE_MODE_CODES['normal']
         self.drs_active = False  # DRS active
         self.ers_energy = 100.0  # ERS energy (%)
         
@@ -279,6 +300,7 @@ class RaceSim:
             c.v = 0.0
             c.tyre = random.choice(['SOFT', 'MEDIUM', 'HARD'])
             c.tire_compound = c.tyre
+            c.tyre_code = TYRE_CODES[c.tyre]
             c.track_temp = self.weather.get('track_temp', 25.0)
             c.tire_temp = self.weather.get('track_temp', 25.0) + 10.0  # Start slightly above ambient
             
@@ -367,16 +389,28 @@ class RaceSim:
         if not self.race_started:
             return
         
+        # Track positions and pit status for all cars, kept in sync as cars move
+        cars_s = np.array([c.s for c in self.cars], dtype=float)
+        cars_on_pit = np.array([c.on_pit for c in self.cars], dtype=bool)
+        
+        # Track poses for LiDAR from one batched spline evaluation, refreshed per moved car
+        car_poses = None
+        if self.lidar_simulator:
+            from lidar_simulator import compute_car_poses
+            car_poses = compute_car_poses(self.track, self.cars)
+        
         # One physics step (self.dt seconds)
-        for car in self.cars:
+        for i, car in enumerate(self.cars):
             if car.on_pit:
                 # Handle pit stop
                 car.pit_counter -= self.dt
                 if car.pit_counter <= 0:
                     car.on_pit = False
+                    cars_on_pit[i] = False
                     car.pit_counter = 0
                     car.tyre = random.choice(['SOFT', 'MEDIUM', 'HARD'])
                     car.tire_compound = car.tyre
+                    car.tyre_code = TYRE_CODES[car.tyre]
                     car.wear *= 0.15
                     car.fuel = 100.0
                 continue
@@ -391,7 +425,7 @@ class RaceSim:
             if self.lidar_simulator:
                 try:
                     lidar_data = self.lidar_simulator.generate_lidar_for_car(
-                        car, self.track, self.cars, self.track_boundaries
+                        car, self.track, self.cars, self.track_boundaries, car_poses
                     )
                     car.lidar = lidar_data
                 except Exception as e:
@@ -404,16 +438,17 @@ class RaceSim:
             overtaking_maneuver = None
             drs_eligible = False
             
+            slipstream_boost = 1.0
+            
             if self.advanced_driving:
-                # Detect car ahead
-                car_ahead = self.advanced_driving.detect_car_ahead(
-                    car, self.cars, self.track, self.track['total_length']
-                )
-                
-                # Check DRS eligibility
-                drs_eligible = self.advanced_driving.check_drs_eligibility(
-                    car, car_ahead, self.track
+                # Detect car ahead, DRS eligibility and slipstream in one pass
+                interactions = self.advanced_driving.update_race_interactions(
+                    car, self.cars, self.track, self.track['total_length'],
+                    cars_s, cars_on_pit
                 )
+                car_ahead = interactions.car_ahead
+                drs_eligible = interactions.drs_ok
+                slipstream_boost = interactions.slipstream_boost
                 car.drs_active = drs_eligible
                 
                 # Check overtaking opportunity
@@ -421,12 +456,12 @@ class RaceSim:
                     gap_info = self.advanced_driving.check_overtaking_gap(
                         car, car_ahead, lidar_data, self.track
                     )
-                    if gap_info['can_overtake']:
+                    if gap_info.can_overtake:
                         overtaking_maneuver = self.advanced_driving.plan_overtaking_maneuver(
                             car, car_ahead, gap_info, self.track
                         )
                         car.overtaking = True
-                        car.target_line_offset = overtaking_maneuver.get('target_line_offset', 0.0)
+                        car.target_line_offset = overtaking_maneuver.target_line_offset
                     else:
                         car.overtaking = False
                 else:
@@ -451,8 +486,8 @@ class RaceSim:
                     
                     # Apply overtaking adjustments
                     if overtaking_maneuver:
-                        steering += overtaking_maneuver.get('steering_adjustment', 0.0)
-                        throttle_boost = overtaking_maneuver.get('throttle_boost', 0.0)
+                        steering += overtaking_maneuver.steering_adjustment
+                        throttle_boost = overtaking_maneuver.throttle_boost
                         throttle = min(1.0, throttle + throttle_boost)
                     
                 except Exception as e:
@@ -464,9 +499,7 @@ class RaceSim:
                 throttle, brake, steering = self._basic_control(car, curv)
             
             # Apply slipstream effect
-            if self.advanced_driving and car_ahead:
-                slipstream_boost = self.advanced_driving.calculate_slipstream_effect(car, car_ahead)
-                car.v *= slipstream_boost
+            car.v *= slipstream_boost
             
             # Apply enhanced physics if available
             if self.physics_engine:
@@ -544,6 +577,9 @@ class RaceSim:
             
             # Move along track
             car.s += car.v * self.dt
+            cars_s[i] = car.s
+            if car_poses is not None:
+                car_poses[i] = compute_car_poses(self.track, [car])[0]
             
             # Lap crossing detection
             L = self.track['total_length']
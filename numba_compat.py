@@ -0,0 +1,31 @@
+"""
+Optional Numba support for the F1 Simulator kernels.
+Exposes njit/prange from numba when installed, otherwise falls back to
+plain Python so the simulator still runs (just slower).
+
+Set NOPIUM_DISABLE_NUMBA=1 to use the fallback even when numba is
+installed. Compiled kernels are cached in __nopium_numba_cache__ next to
+this file unless NUMBA_CACHE_DIR is set.
+"""
+
+import os
+
+os.environ.setdefault(
+    'NUMBA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '__nopium_numba_cache__')
+)
+
+try:
+    if os.environ.get('NOPIUM_DISABLE_NUMBA', '').lower() in ('1', 'true', 'yes'):
+        raise ImportError('numba disabled by NOPIUM_DISABLE_NUMBA')
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Identity stand-in for numba.njit, supporting both @njit and @njit(...)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
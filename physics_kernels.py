@@ -0,0 +1,89 @@
+"""
+Ahead-of-time compiled physics and LiDAR kernels.
+
+Running `python physics_kernels.py` compiles the @njit kernels from
+enhanced_physics and lidar_simulator into the _physics_kernels_aot
+extension next to this file. When that extension is importable the
+simulator calls it directly, so the hot path needs no JIT compilation at
+startup (and no numba at runtime). Without it, the modules fall back to
+their JIT or NumPy paths.
+
+Rebuild after changing any exported kernel; a stale extension keeps the
+old behaviour.
+"""
+
+import os
+
+try:
+    import _physics_kernels_aot as _aot
+except ImportError:
+    _aot = None
+
+AOT_AVAILABLE = _aot is not None
+
+AOT_MODULE_NAME = '_physics_kernels_aot'
+
+# Exported name -> (module, kernel, signature). AOT functions are compiled
+# serially, so prange loops run as plain loops.
+EXPORTS = {
+    'step_all': (
+        'enhanced_physics', '_step_all',
+        'void(f8[:], f8[:], i8[:], i8[:], b1[:], f8[:], i8[:], f8[:], f8[:], '
+        'f8[:], f8[:], f8[:], f8[:], f8, f8[:], f8[:], f8[:], '
+        'f8[:], f8[:], f8[:], f8, f8, f8, f8, '
+        'f8, f8, f8, f8, f8, f8, f8, f8, f8, f8)'
+    ),
+    'cast_rays_segments': (
+        'lidar_simulator', '_cast_rays_segments',
+        'f8[:](f8, f8, f8[:], f8[:], f8[:, :], f8)'
+    ),
+    'cast_rays_grid': (
+        'lidar_simulator', '_cast_rays_grid',
+        'f8[:](f8, f8, f8[:], f8[:], f8[:, :], i8[:], i8[:], f8, f8, f8, i8, i8, f8)'
+    ),
+    'cast_rays_circles': (
+        'lidar_simulator', '_cast_rays_circles',
+        'void(f8, f8, f8[:], f8[:], f8[:, :], f8[:])'
+    ),
+    'cast_rays_polygons': (
+        'lidar_simulator', '_cast_rays_polygons',
+        'void(f8, f8, f8[:], f8[:], f8[:, :], i8[:], f8[:], f8[:], f8[:], f8[:])'
+    ),
+}
+
+
+def aot_kernel(name):
+    """
+    Precompiled kernel by exported name.
+
+    Args:
+        name: Key of EXPORTS
+
+    Returns:
+        Compiled function, or None if the extension isn't built
+    """
+    return getattr(_aot, name, None)
+
+
+def build(output_dir=None):
+    """
+    Compile every kernel in EXPORTS into the AOT extension (requires numba).
+
+    Args:
+        output_dir: Directory for the extension (default: next to this file)
+    """
+    import importlib
+    from numba.pycc import CC
+
+    cc = CC(AOT_MODULE_NAME)
+    cc.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+
+    for export_name, (module_name, kernel_name, signature) in EXPORTS.items():
+        kernel = getattr(importlib.import_module(module_name), kernel_name)
+        cc.export(export_name, signature)(kernel.py_func)
+
+    cc.compile()
+
+
+if __name__ == '__main__':
+    build()
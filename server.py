@@ -6,12 +6,13 @@ Real-time race simulation with WebSocket broadcasting
 import asyncio
 import json
 import numpy as np
-import random
 import math
+import zlib
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Set, Optional
+from typing import Dict, List, Optional, NamedTuple
+from types import SimpleNamespace
 from scipy.interpolate import CubicSpline
 
 # Import simulation logic from nice.py
@@ -19,6 +20,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
+from numba_compat import njit, prange, NUMBA_AVAILABLE
+
 # Try to import enhanced RaceSim from nice.py
 USE_ENHANCED = False
 try:
@@ -30,6 +33,18 @@ except ImportError as e:
     print(f"⚠ Warning: Could not import enhanced RaceSim from nice.py: {e}")
     print("   Using basic physics version")
 
+# MessagePack is optional: clients can opt into binary frames when it's installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson is optional: a faster encoder for the JSON frames when it's installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # -------------------- Track & Simulation Core --------------------
 
 TYRE_BASE = {
@@ -56,23 +71,115 @@ TYRE_HEAT_FACTORS = {
     'WET': 0.9      # Less heat generation
 }
 
+# Compound encoding for the per-car tyre_idx array, with the tables above
+# laid out so they can be indexed by it. Dry compounds come first, so
+# tyre_idx < N_DRY_TYRES means SOFT/MEDIUM/HARD.
+TYRE_NAMES = ('SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET')
+TYRE_INDEX = {name: i for i, name in enumerate(TYRE_NAMES)}
+N_DRY_TYRES = 3
+_TYRE_INTERMEDIATE = TYRE_INDEX['INTERMEDIATE']
+_TYRE_WET = TYRE_INDEX['WET']
+TYRE_BASE_ARR = np.array([TYRE_BASE[name] for name in TYRE_NAMES])
+TYRE_WEAR_ARR = np.array([TYRE_WEAR_RATES[name] for name in TYRE_NAMES])
+TYRE_HEAT_ARR = np.array([TYRE_HEAT_FACTORS[name] for name in TYRE_NAMES])
+
+# Per-car numeric state kept as parallel arrays on RaceSim (one entry per
+# car, name -> dtype); CarState exposes each as a property of the same name.
+# float32 halves the state's memory traffic; s (cumulative distance),
+# total_time and the leaderboard intervals keep float64 so late-race
+# positions, rankings and gaps stay exact.
+CAR_ARRAY_FIELDS = {
+    's': np.float64,
+    'v': np.float32,
+    'wear': np.float32,
+    'fuel': np.float32,
+    'tire_temp': np.float32,
+    'total_time': np.float64,
+    'laps_completed': np.int32,
+    'next_lap_s': np.float64,  # Distance at which laps_completed next increments
+    'on_pit': np.bool_,
+    'pit_counter': np.float32,
+    'drs_active': np.bool_,
+    'tyre_idx': np.int32,
+    'error_active': np.bool_,
+    'error_timer': np.float32,
+    'error_speed_multiplier': np.float32,
+    'driver_skill': np.float32,
+    'car_skill': np.float32,
+    'aggression': np.float32,
+    'time_interval': np.float64,
+    'distance_interval': np.float64,
+    'gap_ahead': np.float64,
+    'distance_gap_ahead': np.float64,
+}
+
+def allocate_car_arrays(owner, n):
+    """Attach a zeroed array of length n to owner for every CAR_ARRAY_FIELDS entry"""
+    for name, dtype in CAR_ARRAY_FIELDS.items():
+        setattr(owner, name, np.zeros(n, dtype=dtype))
+
+def _car_array_property(name):
+    """Property reading/writing this car's entry of the named state array"""
+    def fget(self):
+        return getattr(self._arrays, name).item(self._idx)
+
+    def fset(self, value):
+        getattr(self._arrays, name)[self._idx] = value
+
+    return property(fget, fset)
+
+class WeatherFactors(NamedTuple):
+    """Weather-dependent terms of the car physics, shared by every car in a step"""
+    rain: float
+    ambient_temp: float
+    tyre_grip: np.ndarray  # Grip multiplier of each compound, indexed by tyre_idx
+    straight_speed: float  # Rain multiplier on straight-line speed
+    cornering_speed: float  # Wind multiplier on cornering speed
+    cooling: float  # Rain multiplier on the tyre cooling rate
+    rain_cooling: float  # Extra cooling per second per degree above ambient
+
+def weather_factors(weather):
+    """
+    Precompute the weather-dependent terms used by RaceSim.step.
+
+    Args:
+        weather: Weather dict with 'rain', 'track_temp' and 'wind'
+
+    Returns:
+        WeatherFactors
+    """
+    rain = weather.get('rain', 0.0)
+    tyre_grip = np.full(len(TYRE_NAMES), 1.0 - 0.9 * rain)
+    tyre_grip[_TYRE_WET] = 1.0 + 0.5 * rain
+    tyre_grip[_TYRE_INTERMEDIATE] = (1.0 + 0.3 * rain) if rain > 0.3 else (1.0 - 0.5 * rain)
+    return WeatherFactors(
+        rain=rain,
+        ambient_temp=weather.get('track_temp', 25.0),
+        tyre_grip=tyre_grip,
+        straight_speed=1 - 0.25 * rain,
+        cornering_speed=1 - 0.015 * weather.get('wind', 0.0),
+        cooling=1.0 + rain * 0.5,
+        rain_cooling=rain * 0.15,
+    )
+
 PIT_TIME_BASE = 22.0  # Base pitstop time in seconds
 
-def get_pitstop_time():
+def get_pitstop_time(rng, size=None):
     """
     Generate variable pitstop time with realistic variation.
     Normal variation: ±1 second (using normal distribution, σ=0.5)
     Bad cases: ±2 seconds (5-10% probability)
     Based on real-world F1 data: average ~2.2s service time, but total pit lane time ~20-30s
+
+    Args:
+        rng: numpy Generator to draw from
+        size: Number of pit times to draw (None for a single float)
     """
-    # 5-10% chance of bad pitstop (±2 seconds)
-    if random.random() < 0.075:  # 7.5% chance
-        variation = random.uniform(-2.0, 2.0)
-    else:
-        # Normal variation: ±1 second using normal distribution
-        variation = np.random.normal(0.0, 0.5)
-        variation = max(-1.0, min(1.0, variation))  # Clamp to ±1 second
-    
+    # 5-10% chance of bad pitstop (±2 seconds), otherwise normal variation clamped to ±1 second
+    bad = rng.random(size) < 0.075  # 7.5% chance
+    variation = np.where(bad, rng.uniform(-2.0, 2.0, size), np.clip(rng.normal(0.0, 0.5, size), -1.0, 1.0))
+    if size is None:
+        return PIT_TIME_BASE + float(variation)
     return PIT_TIME_BASE + variation
 
 def load_gp_track_simple():
@@ -105,6 +212,35 @@ def load_gp_track_simple():
     ], dtype=float)
     return waypoints
 
+def uniform_lookup(table, arc, total_length, inv_dx):
+    """
+    Linearly interpolate a table sampled at uniform arc-length steps.
+
+    Args:
+        table: Samples at arc lengths k / inv_dx, k = 0..N (N + 1 rows)
+        arc: Arc length(s) in metres, wrapped onto the track
+        total_length: Track length
+        inv_dx: Samples per metre (N / total_length)
+
+    Returns:
+        Interpolated value(s), same shape as arc
+    """
+    if np.ndim(arc) == 0:
+        # Per-car queries: plain float math beats a chain of NumPy calls
+        f = (float(arc) % total_length) * inv_dx
+        i = min(int(f), len(table) - 2)
+        frac = f - i
+        if table.ndim == 1:
+            return table.item(i) * (1.0 - frac) + table.item(i + 1) * frac
+        return table[i] * (1.0 - frac) + table[i + 1] * frac
+    f = np.mod(arc, total_length) * inv_dx
+    i = np.minimum(np.floor(f).astype(np.int64), len(table) - 2)
+    frac = f - i
+    if table.ndim > 1:
+        # Rows of several quantities sampled together
+        frac = np.expand_dims(frac, -1)
+    return table[i] * (1.0 - frac) + table[i + 1] * frac
+
 def build_spline(waypoints, n_points=2000):
     """Build periodic cubic spline"""
     L = len(waypoints)
@@ -124,26 +260,74 @@ def build_spline(waypoints, n_points=2000):
     s_arclen = s_arclen - s_arclen[0]
     total_length = s_arclen[-1]
 
-    x1 = csx(ss, 1)
-    y1 = csy(ss, 1)
+    x1 = dx
+    y1 = dy
     x2 = csx(ss, 2)
     y2 = csy(ss, 2)
     curvature = np.abs(x1 * y2 - y1 * x2) / (x1 * x1 + y1 * y1 + 1e-9) ** 1.5
 
+    # Sample the spline densely once; runtime queries interpolate these tables
+    # instead of going through CubicSpline (and work from njit kernels)
+    xs_dense = csx(ss)
+    ys_dense = csy(ss)
+    inv_speed = 1.0 / np.maximum(speeds, 1e-12)
+    tx_dense = x1 * inv_speed
+    ty_dense = y1 * inv_speed
+
+    # ss is uniform in u, so queries by u are uniform lookups as well (u
+    # wraps onto [0, 1) like the closed track)
+    inv_du = n_points - 1
+    xy_dense = np.column_stack([xs_dense, ys_dense])
+
     def pos(u):
-        return np.vstack([csx(u), csy(u)]).T
+        return np.atleast_2d(uniform_lookup(xy_dense, u, 1.0, inv_du))
 
     def curv(u):
-        return np.interp(u, ss, curvature)
+        return uniform_lookup(curvature, u, 1.0, inv_du)
+
+    # Uniform arc-length tables: s_to_u and curvature-by-distance become an
+    # index plus one linear blend instead of a binary search
+    n_uniform = 8192
+    s_uniform = np.linspace(0, total_length, n_uniform + 1)
+    u_of_s = np.interp(s_uniform, s_arclen, ss)
+    curv_of_s = np.interp(s_uniform, s_arclen, curvature)
+    inv_dx = n_uniform / total_length
 
     def s_to_u(arc):
-        arc = np.mod(arc, total_length)
-        u = np.interp(arc, s_arclen, ss)
-        return u
+        return uniform_lookup(u_of_s, arc, total_length, inv_dx)
+
+    def curv_at_s(arc):
+        return uniform_lookup(curv_of_s, arc, total_length, inv_dx)
+
+    # Centerline position and unit tangent on the same uniform grid, for
+    # rendering car poses without evaluating the spline
+    pose_of_s = np.stack([
+        np.interp(u_of_s, ss, xs_dense),
+        np.interp(u_of_s, ss, ys_dense),
+        np.interp(u_of_s, ss, tx_dense),
+        np.interp(u_of_s, ss, ty_dense),
+    ], axis=-1)
+
+    def pose_at_s(arc):
+        """(x, y, heading) of the centerline at arc length(s) arc"""
+        x, y, tx, ty = np.moveaxis(uniform_lookup(pose_of_s, arc, total_length, inv_dx), -1, 0)
+        return x, y, np.arctan2(ty, tx)
 
     # Get track boundary for visualization
     track_points = pos(ss)
 
+    # Dense centerline lookup tables (~3m spacing) so per-tick queries by arc
+    # length become O(1) index reads instead of spline evaluations
+    n_lut = max(int(total_length / 3.0), 2)
+    lut_ds = total_length / n_lut
+    u_lut = s_to_u(np.arange(n_lut) * lut_ds)
+    pos_lut = pos(u_lut)
+    curv_lut = curv(u_lut)
+    tang_lut = np.roll(pos_lut, -1, axis=0) - pos_lut
+    tang_len = np.hypot(tang_lut[:, 0], tang_lut[:, 1])
+    inv_len = np.where(tang_len > 1e-6, 1.0 / np.maximum(tang_len, 1e-12), 0.0)
+    tang_lut *= inv_len[:, None]
+
     return {
         'pos': pos, 
         'curv': curv,
@@ -151,11 +335,42 @@ def build_spline(waypoints, n_points=2000):
         'total_length': total_length, 
         's_to_u': s_to_u,
         'ss': ss,
-        'track_points': track_points.tolist()
+        'xs_dense': xs_dense,
+        'ys_dense': ys_dense,
+        'tx_dense': tx_dense,
+        'ty_dense': ty_dense,
+        'curvature_dense': curvature,
+        'u_of_s': u_of_s,
+        'curv_of_s': curv_of_s,
+        'inv_dx': inv_dx,
+        'curv_at_s': curv_at_s,
+        'pose_at_s': pose_at_s,
+        'track_points': track_points.tolist(),
+        'pos_lut': pos_lut,
+        'curv_lut': curv_lut,
+        'tang_lut': tang_lut,
+        'ds': lut_ds
     }
 
 class CarState:
+    # Array-backed fields (CAR_ARRAY_FIELDS, tyre) are properties, not slots
+    __slots__ = (
+        '_arrays', '_idx', 'name', 'color', 'laptime', 'position',
+        'engine_rpm', 'gear', 'throttle', 'brake_pressure', 'tire_pressure',
+        'aero_downforce', 'drag_coeff', 'yaw_rate', 'slip_angle', 'engine_mode',
+        'ers_energy', 'mass', 'power_max', 'brake_bias', 'suspension_stiffness',
+        'tire_compound', 'lidar', 'controller_type', 'overtaking',
+        'target_line_offset', 'track_temp', 'pitstop_history', 'pitstop_count',
+        '_undercut_summary', 'position_before_pitstop', 'pitstop_lap',
+    )
+
     def __init__(self, name, color, driver_skill=0.9, car_skill=0.85, aggression=0.5):
+        # Numeric state lives in CAR_ARRAY_FIELDS arrays: a standalone car owns
+        # a single-entry set until bind() moves it into the simulation's arrays
+        self._arrays = SimpleNamespace()
+        allocate_car_arrays(self._arrays, 1)
+        self._idx = 0
+
         self.name = name
         self.color = color
         self.driver_skill = driver_skill
@@ -207,6 +422,7 @@ class CarState:
         # Pitstop history tracking
         self.pitstop_history = []  # List of dicts: {'lap': int, 'tyre': str, 'undercuts': dict}
         self.pitstop_count = 0
+        self._undercut_summary = None  # Cached _get_undercut_summary(), cleared when undercuts are recorded
         # Track position before pitstop for undercut calculation
         self.position_before_pitstop = None
         self.pitstop_lap = None  # Track the lap when current pitstop occurred
@@ -216,20 +432,41 @@ class CarState:
         self.error_timer = 0.0
         self.error_speed_multiplier = 1.0
         
-        # Gap/interval tracking (initialized, will be calculated in get_state)
+        # Gap/interval tracking (initialized, calculated by RaceSim.update_intervals)
         self.time_interval = 0.0
         self.distance_interval = 0.0
         self.gap_ahead = 0.0
         self.distance_gap_ahead = 0.0
 
+    @property
+    def idx(self):
+        """Index of this car in the simulation's state arrays"""
+        return self._idx
+
+    @property
+    def tyre(self):
+        return TYRE_NAMES[self._arrays.tyre_idx[self._idx]]
+
+    @tyre.setter
+    def tyre(self, name):
+        self._arrays.tyre_idx[self._idx] = TYRE_INDEX[name]
+
+    def bind(self, arrays, idx):
+        """
+        Move this car's numeric state into entry idx of shared state arrays.
+
+        Args:
+            arrays: Object holding CAR_ARRAY_FIELDS arrays (e.g. a RaceSim)
+            idx: Index of this car in those arrays
+        """
+        for name in CAR_ARRAY_FIELDS:
+            getattr(arrays, name)[idx] = getattr(self._arrays, name)[self._idx]
+        self._arrays = arrays
+        self._idx = idx
+
     def to_dict(self, track):
-        u = track['s_to_u'](self.s)
-        pos = track['pos'](u)[0]
-        
-        # Calculate heading
-        u2 = track['s_to_u'](self.s + 1.0)
-        pos2 = track['pos'](u2)[0]
-        angle = math.atan2(pos2[1] - pos[1], pos2[0] - pos[0])
+        # Position and heading from the centerline lookup tables
+        x, y, angle = track['pose_at_s'](self.s)
         
         return {
             'name': self.name,
@@ -240,35 +477,40 @@ class CarState:
             'tyre': self.tyre,
             'fuel': round(self.fuel, 1),
             'speed': round(self.v * 3.6, 1),  # km/h
-            'x': float(pos[0]),
-            'y': float(pos[1]),
+            'x': float(x),
+            'y': float(y),
             'angle': float(angle),
             'total_time': round(self.total_time, 2),
             'on_pit': self.on_pit,
             # Enhanced physics parameters
-            'rpm': round(getattr(self, 'engine_rpm', 5000), 0),
-            'gear': getattr(self, 'gear', 1),
-            'throttle': round(getattr(self, 'throttle', 0.0), 2),
-            'brake': round(getattr(self, 'brake_pressure', 0.0), 2),
-            'tire_temp': round(getattr(self, 'tire_temp', 100.0), 1),
-            'drs_active': getattr(self, 'drs_active', False),
-            'ers_energy': round(getattr(self, 'ers_energy', 100.0), 1),
-            'controller_type': getattr(self, 'controller_type', 'pure_pursuit'),
-            'overtaking': getattr(self, 'overtaking', False),
-            'aero_downforce': round(getattr(self, 'aero_downforce', 0.0), 0),
-            'pitstop_history': getattr(self, 'pitstop_history', []),
-            'pitstop_count': getattr(self, 'pitstop_count', 0),
-            'time_interval': round(getattr(self, 'time_interval', 0.0), 3),
-            'distance_interval': round(getattr(self, 'distance_interval', 0.0), 1),
-            'gap_ahead': round(getattr(self, 'gap_ahead', 0.0), 3),
-            'distance_gap_ahead': round(getattr(self, 'distance_gap_ahead', 0.0), 1),
+            'rpm': round(self.engine_rpm, 0),
+            'gear': self.gear,
+            'throttle': round(self.throttle, 2),
+            'brake': round(self.brake_pressure, 2),
+            'tire_temp': round(self.tire_temp, 1),
+            'drs_active': self.drs_active,
+            'ers_energy': round(self.ers_energy, 1),
+            'controller_type': self.controller_type,
+            'overtaking': self.overtaking,
+            'aero_downforce': round(self.aero_downforce, 0),
+            'pitstop_history': self.pitstop_history,
+            'pitstop_count': self.pitstop_count,
+            'time_interval': round(self.time_interval, 3),
+            'distance_interval': round(self.distance_interval, 1),
+            'gap_ahead': round(self.gap_ahead, 3),
+            'distance_gap_ahead': round(self.distance_gap_ahead, 1),
             'undercut_summary': self._get_undercut_summary()
         }
     
     def _get_undercut_summary(self):
-        """Get summary of undercuts for this car's pitstops"""
+        """
+        Get summary of undercuts for this car's pitstops.
+        Cached between pitstops; finalize_undercut_battles clears the cache.
+        """
+        if self._undercut_summary is not None:
+            return self._undercut_summary
         summary = []
-        for pitstop in getattr(self, 'pitstop_history', []):
+        for pitstop in self.pitstop_history:
             if 'undercuts' in pitstop and pitstop['undercuts']:
                 # Find significant undercuts (>1 second gain or loss)
                 significant = []
@@ -284,11 +526,193 @@ class CarState:
                         'lap': pitstop.get('lap', 0),
                         'undercuts': significant
                     })
+        self._undercut_summary = summary
         return summary
 
+for _name in CAR_ARRAY_FIELDS:
+    setattr(CarState, _name, _car_array_property(_name))
+
+@njit(cache=True, fastmath=True)
+def _tyre_grip(tyre, wear, driver_skill, car_skill, tyre_base, tyre_weather_grip):
+    """Compiled RaceSim.tyre_grip_coeff for one car"""
+    grip = tyre_base[tyre] * (1 - 0.6 * wear)
+    grip *= tyre_weather_grip[tyre]
+    grip *= (0.8 + 0.4 * (0.7 * driver_skill + 0.3 * car_skill))
+    return max(grip, 0.05)
+
+@njit(cache=True, fastmath=True)
+def _cornering_speed(grip, curvature, fuel, wind_factor):
+    """Compiled RaceSim.cornering_speed for one car"""
+    v = math.sqrt(grip * 12.0 / max(curvature, 1e-6))
+    v *= (1 - 0.001 * fuel)
+    v *= wind_factor
+    return v
+
+@njit(cache=True, fastmath=True)
+def _straight_speed(grip, tyre_base, driver_skill, car_skill, fuel, rain_factor, drs):
+    """Compiled RaceSim.straight_speed for one car"""
+    base = 80.0 + 20.0 * (0.6 * driver_skill + 0.4 * car_skill)
+    base *= rain_factor
+    base *= (0.90 + 0.15 * tyre_base)
+    base *= (0.95 + 0.1 * grip)
+    base *= (1 - 0.001 * fuel)
+    if drs:
+        base *= 1.10
+    return base
+
+@njit(cache=True, fastmath=True)
+def _uniform_lookup(table, arc, total_length, inv_dx):
+    """Compiled uniform_lookup for a single arc length"""
+    f = (arc % total_length) * inv_dx
+    i = min(int(f), table.shape[0] - 2)
+    frac = f - i
+    return table[i] * (1.0 - frac) + table[i + 1] * frac
+
+@njit(cache=True, fastmath=True)
+def _step_kernel(s, v, wear, fuel, tire_temp, laps_completed, next_lap_s, moving, on_pit, drs_active,
+                 tyre_idx, error_active, error_timer, error_speed_multiplier,
+                 driver_skill, car_skill, order, rank, curv_of_s, inv_dx, total_length,
+                 tyre_base, tyre_wear, tyre_heat, tyre_weather_grip, straight_factor,
+                 cornering_factor, cooling_factor, rain_cooling, ambient_temp, dt):
+    """
+    Advance every car on track by one step, updating the state arrays in place.
+
+    Covers DRS, defensive behaviour, target speed, braking, error slowdown,
+    tyre wear and temperature, fuel and lap counting (see RaceSim.step).
+    Gaps are measured on the positions at the start of the step. Each car
+    only writes its own entries, so both loops can run in parallel.
+
+    Args:
+        s, v, ...: CAR_ARRAY_FIELDS arrays of the RaceSim
+        moving: Boolean mask of cars on track this step
+        order: Car indices in leaderboard order
+        rank: Leaderboard position (0-based) of each car
+        curv_of_s, inv_dx: Uniform curvature-by-distance table from build_spline
+        total_length: Track length
+        tyre_base, tyre_wear, tyre_heat: Compound tables indexed by tyre_idx
+        tyre_weather_grip ... ambient_temp: WeatherFactors terms
+        dt: Time step
+    """
+    n = s.shape[0]
+    curv = np.zeros(n)
+    new_v = v.copy()
+    leader = order[0]
+    drs_start = 0.35 * total_length
+    drs_end = 0.45 * total_length
+
+    for i in prange(n):
+        if not moving[i]:
+            continue
+        curv[i] = _uniform_lookup(curv_of_s, s[i], total_length, inv_dx)
+        rank_i = rank[i]
+        vi = v[i]
+
+        # DRS: after 3 laps by leader, within 1s of car ahead and leader, in the DRS zone
+        drs = False
+        s_normalized = s[i] % total_length
+        if (rank_i > 0 and laps_completed[leader] >= 3
+                and drs_start <= s_normalized <= drs_end):
+            ahead = order[rank_i - 1]
+            time_gap_ahead = 999.0
+            time_gap_leader = 999.0
+            if vi > 0.1:
+                time_gap_ahead = ((laps_completed[i] - laps_completed[ahead]) * total_length
+                                  + (s[ahead] - s[i])) / vi
+                time_gap_leader = ((laps_completed[i] - laps_completed[leader]) * total_length
+                                   + (s[leader] - s[i])) / vi
+            drs = 0 < time_gap_ahead <= 1.0 and 0 < time_gap_leader <= 1.0
+        drs_active[i] = drs
+
+        # Defensive behaviour: hold up a car 0.5-3s behind on straights
+        defensive = 1.0
+        if rank_i < n - 1:
+            behind = order[rank_i + 1]
+            if not on_pit[behind]:
+                gap = ((laps_completed[i] - laps_completed[behind]) * total_length
+                       + (s[i] - s[behind]))
+                if gap < 0:
+                    gap += total_length
+                if gap > total_length / 2:
+                    gap = total_length - gap
+                if vi > 0.1 and gap > 0:
+                    time_gap = gap / vi
+                    if 0.5 <= time_gap <= 3.0 and curv[i] < 0.001:
+                        defensive = 0.98 - (0.06 * (3.0 - time_gap) / 2.5)
+
+        tyre = tyre_idx[i]
+        grip = _tyre_grip(tyre, wear[i], driver_skill[i], car_skill[i], tyre_base, tyre_weather_grip)
+        curv_ahead = _uniform_lookup(curv_of_s, s[i] + vi * 2.0, total_length, inv_dx)
+        # The tighter of the current and upcoming corner sets the cornering limit
+        target_v = min(
+            _straight_speed(grip, tyre_base[tyre], driver_skill[i], car_skill[i],
+                            fuel[i], straight_factor, drs) * defensive,
+            _cornering_speed(grip, max(curv[i], curv_ahead), fuel[i], cornering_factor),
+        )
+
+        if vi > target_v:
+            vi -= (20.0 if vi - target_v > 5.0 else 15.0) * dt
+        elif vi < target_v:
+            vi += 6.0 * dt
+        vi = max(0.0, min(vi, target_v))
+
+        if error_active[i]:
+            vi *= error_speed_multiplier[i]
+            error_timer[i] -= dt
+            if error_timer[i] <= 0:
+                error_active[i] = False
+                error_timer[i] = 0.0
+                error_speed_multiplier[i] = 1.0
+        new_v[i] = vi
+
+    # Second pass so the gaps above all see start-of-step positions
+    for i in prange(n):
+        if not moving[i]:
+            continue
+        vi = new_v[i]
+        v[i] = vi
+        tyre = tyre_idx[i]
+
+        grip = _tyre_grip(tyre, wear[i], driver_skill[i], car_skill[i], tyre_base, tyre_weather_grip)
+        wear_rate = 0.0005 * (1 + 0.8 * (1 - grip)) * tyre_wear[tyre]
+        if drs_active[i]:
+            wear_rate *= 1.05
+        wear[i] = min(wear[i] + wear_rate * dt, 0.99)
+
+        heat_factor = tyre_heat[tyre]
+        c = curv[i]
+        if c > 0.002:
+            heat_gen = 2.5 * vi * vi * c * heat_factor + 0.3 * vi * heat_factor
+            cooling_rate = 0.02
+        elif c < 0.0005:
+            heat_gen = 0.15 * vi * heat_factor
+            cooling_rate = 0.08
+        else:
+            heat_gen = 0.8 * vi * abs(c) * 100 * heat_factor
+            cooling_rate = 0.08
+        excess = tire_temp[i] - ambient_temp
+        cooling = cooling_rate * cooling_factor * excess * (1 + vi * 0.01)
+        cooling += rain_cooling * excess * dt
+        tire_temp[i] = max(ambient_temp + 20, min(tire_temp[i] + (heat_gen - cooling) * dt, 150.0))
+
+        fuel[i] = max(fuel[i] - 0.02 * dt, 0.0)
+
+        s[i] += vi * dt
+        if s[i] >= next_lap_s[i]:
+            laps_completed[i] += 1
+            next_lap_s[i] += total_length
+
+# Multithreaded build of _step_kernel for large fields, compiled on first use.
+# Not cached on disk: numba's cache can't tell the two builds apart.
+_step_kernel_parallel = njit(fastmath=True, parallel=True)(getattr(_step_kernel, 'py_func', _step_kernel))
+
+# Fields with at least this many cars use _step_kernel_parallel; for smaller
+# ones starting the threads costs more than the loops themselves
+PARALLEL_STEP_MIN_CARS = 256
+
 class RaceSim:
-    def __init__(self, track_layout, n_cars=20, weather=None):
+    def __init__(self, track_layout, n_cars=20, weather=None, seed=None):
         self.track = track_layout
+        self.rng = np.random.default_rng(seed)
         self.cars = []
         self.dt = 0.5
         self.time = 0.0
@@ -335,6 +759,10 @@ class RaceSim:
         ambient_temp = self.weather.get('track_temp', 25.0)
         initial_tire_temp = max(80.0, ambient_temp + 55.0)  # Start at realistic F1 tire temp (80-90°C)
         
+        # Random driver aggression and starting dry tyres for the whole grid
+        aggressions = 0.3 + self.rng.random(n) * 0.7
+        start_tyres = self.rng.integers(N_DRY_TYRES, size=n)
+        
         for i in range(n):
             # Get driver data (cycling through if more cars than drivers)
             driver_info = driver_data[i % len(driver_data)]
@@ -343,21 +771,31 @@ class RaceSim:
             c = CarState(name, color,
                         driver_skill=driver_skill,
                         car_skill=car_skill,
-                        aggression=0.3 + random.random()*0.7)
+                        aggression=aggressions[i])
             # F1 grid start: all cars start at same position with 2m spacing
             c.s = i * 2.0  # 2 meters between consecutive cars
             c.v = 0.0
-            c.tyre = random.choice(['SOFT', 'MEDIUM', 'HARD'])
+            c.tyre_idx = start_tyres[i]
             c.tire_temp = initial_tire_temp  # Initialize based on ambient temperature
             self.cars.append(c)
 
+        # Move every car's numeric state into shared arrays so step() can
+        # update the whole field with vector operations
+        allocate_car_arrays(self, n)
+        for i, c in enumerate(self.cars):
+            c.bind(self, i)
+        self.reset_lap_targets()
+        self._sorted_cars = None  # Leaderboard cache, see get_leaderboard()
+        self.get_leaderboard()
+        self.update_gap_table()
+
     def tyre_grip_coeff(self, car):
-        base = TYRE_BASE.get(car.tyre, 0.95)
-        grip = base * (1 - 0.6 * car.wear)
+        tyre = car.tyre_idx
+        grip = TYRE_BASE_ARR[tyre] * (1 - 0.6 * car.wear)
         rain = self.weather['rain']
-        if car.tyre == 'WET':
+        if tyre == _TYRE_WET:
             grip *= (1.0 + 0.5 * rain)
-        elif car.tyre == 'INTERMEDIATE':
+        elif tyre == _TYRE_INTERMEDIATE:
             grip *= (1.0 + 0.3 * rain) if rain > 0.3 else (1.0 - 0.5 * rain)
         else:
             grip *= (1.0 - 0.9 * rain)
@@ -387,16 +825,42 @@ class RaceSim:
         base = 80.0 + 20.0 * combined_skill
         base *= (1 - 0.25 * self.weather['rain'])
         # Apply compound speed multiplier directly (SOFT fastest, HARD slowest)
-        tyre_speed_multiplier = TYRE_BASE.get(car.tyre, 0.95)
+        tyre_speed_multiplier = TYRE_BASE_ARR[car.tyre_idx]
         base *= (0.90 + 0.15 * tyre_speed_multiplier)  # Makes difference more noticeable
         # Also factor in grip coefficient for wear effects
         base *= (0.95 + 0.1 * self.tyre_grip_coeff(car))
         base *= (1 - 0.001 * car.fuel)
         # DRS speed boost: 10% increase when DRS is active
-        if getattr(car, 'drs_active', False):
+        if car.drs_active:
             base *= 1.10
         return base
 
+    def grip_coeffs(self, weather):
+        """Vectorized tyre_grip_coeff for every car, given weather_factors()"""
+        grip = TYRE_BASE_ARR[self.tyre_idx] * (1 - 0.6 * self.wear)
+        grip *= weather.tyre_grip[self.tyre_idx]
+        combined_skill = 0.7 * self.driver_skill + 0.3 * self.car_skill
+        grip *= (0.8 + 0.4 * combined_skill)
+        return np.maximum(grip, 0.05)
+
+    def cornering_speeds(self, weather, grip, curvature):
+        """Vectorized cornering_speed for every car, given grip_coeffs()"""
+        v = np.sqrt(grip * 12.0 / np.maximum(curvature, 1e-6))
+        v *= (1 - 0.001 * self.fuel)
+        v *= weather.cornering_speed
+        return v
+
+    def straight_speeds(self, weather, grip):
+        """Vectorized straight_speed for every car, given grip_coeffs()"""
+        combined_skill = 0.6 * self.driver_skill + 0.4 * self.car_skill
+        base = 80.0 + 20.0 * combined_skill
+        base *= weather.straight_speed
+        base *= (0.90 + 0.15 * TYRE_BASE_ARR[self.tyre_idx])
+        base *= (0.95 + 0.1 * grip)
+        base *= (1 - 0.001 * self.fuel)
+        base *= np.where(self.drs_active, 1.10, 1.0)
+        return base
+
     def error_probability(self, car):
         """
         Calculate error probability based on driver skill and conditions.
@@ -412,7 +876,7 @@ class RaceSim:
         
         # Reduce rain factor for wet/inters tyres (they provide better grip in rain)
         # Dry tyres (SOFT/MEDIUM/HARD) keep full rain impact
-        if car.tyre in ['WET', 'INTERMEDIATE']:
+        if car.tyre_idx >= N_DRY_TYRES:
             rain_factor = 0.3 * rain  # Reduced rain impact for wet tyres
         else:
             rain_factor = 4 * rain  # Full rain impact for dry tyres
@@ -420,6 +884,14 @@ class RaceSim:
         prob = base * (1 + rain_factor + 6 * wear + car.aggression)
         return min(prob, 0.5)
 
+    def error_probabilities(self, weather):
+        """Vectorized error_probability for every car, given weather_factors()"""
+        skill_factor = 1 - self.driver_skill
+        base = 0.00005 + 0.0003 * skill_factor
+        rain_factor = np.where(self.tyre_idx >= N_DRY_TYRES, 0.3 * weather.rain, 4 * weather.rain)
+        prob = base * (1 + rain_factor + 6 * self.wear + self.aggression)
+        return np.minimum(prob, 0.5)
+
     def pitstop_probability(self, car):
         """
         Calculate pitstop probability based on tyre wear and interval patterns.
@@ -430,6 +902,15 @@ class RaceSim:
         - Force pitstop at 90%+ wear regardless of conditions
         - Analyze interval patterns to time pitstops ending in gaps
         - Prevent pitstops when less than 3 laps remaining
+
+        Never builds the leaderboard: intervals come from the gap table that
+        step() refreshes with update_gap_table() for cars that can pit.
+
+        Args:
+            car: CarState to evaluate
+
+        Returns:
+            Pitstop probability per second (0.0 - 1.0)
         """
         # Check if race is almost over - no pitstops if 3 or fewer laps remaining
         laps_remaining = self.total_laps - car.laps_completed
@@ -439,33 +920,10 @@ class RaceSim:
         if car.wear < 0.8:
             return 0.0
         
-        # Get current leaderboard for interval analysis
-        sorted_cars = self.get_leaderboard()
-        car_position = next((i for i, c in enumerate(sorted_cars) if c == car), -1)
-        
-        # Calculate intervals to cars ahead and behind
-        gap_behind = None
-        gap_ahead = None
-        fast_approaching = False
-        
-        if car_position < len(sorted_cars) - 1:
-            car_behind = sorted_cars[car_position + 1]
-            track_length = self.track['total_length']
-            lap_diff_behind = car_behind.laps_completed - car.laps_completed
-            distance_gap_behind = (lap_diff_behind * track_length) + (car.s - car_behind.s)
-            if car.v > 0.1:
-                gap_behind = distance_gap_behind / car.v
-                # Check if car behind is fast approaching (closing gap quickly)
-                if gap_behind < 2.0 and gap_behind > 0:
-                    fast_approaching = True
-        
-        if car_position > 0:
-            car_ahead = sorted_cars[car_position - 1]
-            track_length = self.track['total_length']
-            lap_diff_ahead = car.laps_completed - car_ahead.laps_completed
-            distance_gap_ahead = (lap_diff_ahead * track_length) + (car_ahead.s - car.s)
-            if car.v > 0.1:
-                gap_ahead = distance_gap_ahead / car.v
+        # Intervals for this car from the step's gap table
+        gap_behind = self.gap_behind[car.idx]
+        # Car behind is fast approaching (closing gap quickly)
+        fast_approaching = 0 < gap_behind < 2.0
         
         # Base probability based on wear
         if car.wear < 0.85:
@@ -481,7 +939,7 @@ class RaceSim:
         # Allow stretching to 90% if good conditions
         if 0.8 <= car.wear < 0.90:
             # Stretch if gap behind (>3 seconds) OR fast approaching car (<2 seconds)
-            if gap_behind and gap_behind > 3.0:
+            if gap_behind > 3.0:
                 # Large gap behind - can stretch tires
                 base_prob *= 0.3  # Reduce probability significantly
             elif fast_approaching:
@@ -489,47 +947,13 @@ class RaceSim:
                 base_prob *= 1.5  # Increase probability
                 base_prob = min(1.0, base_prob)
         
-        # Interval pattern analysis: Check if pitstop would end in a gap
-        if car.wear >= 0.80:
-            # Estimate where car will rejoin after pitstop
-            estimated_pit_time = PIT_TIME_BASE + 1.0  # Use average + buffer
-            # Estimate track position after pitstop (car continues at current speed during pit)
-            estimated_rejoin_s = car.s  # Rejoin at same track position
-            estimated_rejoin_time = car.total_time + estimated_pit_time
-            
-            # Check if there's a gap opportunity (no car within 2-3 seconds)
-            gap_opportunity = False
-            for other_car in sorted_cars:
-                if other_car == car or other_car.on_pit:
-                    continue
-                
-                # Calculate where other car will be when this car rejoins
-                time_until_rejoin = estimated_rejoin_time - self.time
-                if time_until_rejoin > 0:
-                    # Estimate other car's position after time_until_rejoin
-                    other_car_future_s = other_car.s + other_car.v * time_until_rejoin
-                    track_length = self.track['total_length']
-                    
-                    # Normalize positions
-                    other_car_normalized = (other_car.laps_completed * track_length) + other_car_future_s
-                    car_normalized = (car.laps_completed * track_length) + estimated_rejoin_s
-                    
-                    # Calculate gap
-                    gap = abs(other_car_normalized - car_normalized)
-                    if car.v > 0.1:
-                        time_gap = gap / car.v
-                        # If gap is between 2-5 seconds, it's a good opportunity
-                        if 2.0 <= time_gap <= 5.0:
-                            gap_opportunity = True
-                            break
-            
-            # Increase probability if gap opportunity exists
-            if gap_opportunity and car.wear >= 0.85:
-                base_prob *= 1.3
-                base_prob = min(1.0, base_prob)
+        # Interval pattern analysis: increase probability if the pitstop would end in a gap
+        if self.gap_opportunity[car.idx] and car.wear >= 0.85:
+            base_prob *= 1.3
+            base_prob = min(1.0, base_prob)
         
         # Count how many cars are currently pitting
-        cars_in_pit = sum(1 for c in self.cars if c.on_pit)
+        cars_in_pit = np.count_nonzero(self.on_pit)
         
         # Smart pitstop strategy: If 3+ cars are pitting, allow cars to stretch tires
         if cars_in_pit >= 3 and 0.8 <= car.wear < 0.90:
@@ -541,6 +965,42 @@ class RaceSim:
         
         return base_prob
 
+    def update_gap_table(self):
+        """
+        Precompute the interval data pitstop_probability reads for every car.
+
+        Uses the cached leaderboard, so call after get_leaderboard(). Sets:
+            gap_behind: Time gap (s) to the car directly behind, NaN if there
+                is none or this car is (nearly) stopped
+            gap_opportunity: Whether a pitstop now would rejoin 2-5 seconds
+                from another running car
+        """
+        n = len(self.cars)
+        track_length = self.track['total_length']
+        rolling = self.v > 0.1
+        safe_v = np.where(rolling, self.v, 1.0)
+
+        gap_behind = np.full(n, np.nan)
+        if n > 1:
+            order = self.sorted_order
+            car, behind = order[:-1], order[1:]
+            distance_gap_behind = ((self.laps_completed[behind] - self.laps_completed[car]) * track_length
+                                   + (self.s[car] - self.s[behind]))
+            gap_behind[car] = np.where(rolling[car], distance_gap_behind / safe_v[car], np.nan)
+        self.gap_behind = gap_behind
+
+        # Where every other car will be when each car would rejoin after an
+        # average pitstop (plus buffer), at its current speed
+        estimated_pit_time = PIT_TIME_BASE + 1.0
+        time_until_rejoin = self.total_time + estimated_pit_time - self.time
+        other_normalized = (self.laps_completed[None, :] * track_length
+                            + (self.s[None, :] + self.v[None, :] * time_until_rejoin[:, None]))
+        car_normalized = self.laps_completed * track_length + self.s
+        time_gap = np.abs(other_normalized - car_normalized[:, None]) / safe_v[:, None]
+        candidates = ~self.on_pit[None, :] & ~np.eye(n, dtype=bool)
+        in_window = candidates & (time_gap >= 2.0) & (time_gap <= 5.0)
+        self.gap_opportunity = (time_until_rejoin > 0) & rolling & in_window.any(axis=1)
+
     def start_race(self):
         """Start the race - allows simulation to proceed"""
         self.race_started = True
@@ -563,170 +1023,91 @@ class RaceSim:
         if not self.race_started or self.paused:
             return
         
-        # Calculate leaderboard once per step for DRS detection
-        sorted_cars = self.get_leaderboard()
-        
-        for car in self.cars:
-            if car.on_pit:
-                car.pit_counter -= self.dt
-                if car.pit_counter <= 0:
-                    car.on_pit = False
-                    car.pit_counter = 0
-                    # Select tyre based on weather and laps remaining
-                    rain = self.weather.get('rain', 0.0)
-                    laps_remaining = self.total_laps - car.laps_completed
-                    if rain > 0.6:
-                        car.tyre = 'WET'
-                    elif rain > 0.3:
-                        car.tyre = 'INTERMEDIATE'
-                    else:
-                        # Prefer softer compounds when race is ending soon
-                        if laps_remaining < 5:
-                            car.tyre = 'SOFT'  # Push for fastest lap times
-                        elif laps_remaining < 10:
-                            car.tyre = random.choice(['SOFT', 'MEDIUM'])  # Prefer softer
-                        else:
-                            car.tyre = random.choice(['SOFT', 'MEDIUM', 'HARD'])
-                    # Update pitstop history with new tyre
-                    if car.pitstop_history:
-                        car.pitstop_history[-1]['new_tyre'] = car.tyre
-                    # Finalize undercut battles where this driver is the second to pit
-                    self.finalize_undercut_battles(car)
-                    car.wear = 0.0  # Reset wear for new tyres
-                    # Reset tire temperature to slightly above ambient (new tyres start warm)
-                    ambient_temp = self.weather.get('track_temp', 25.0)
-                    car.tire_temp = max(80.0, ambient_temp + 55.0)  # New tyres start at realistic F1 temp
-                    car.position_before_pitstop = None  # Reset tracking
-                    car.pitstop_lap = None  # Reset pitstop lap tracking
-                continue
-            
-            u = self.track['s_to_u'](car.s)
-            curv = self.track['curv'](u)
-            
-            # DRS Detection and Activation (before speed calculations)
-            car.drs_active = False
-            # Find car position in leaderboard
-            car_position = next((i for i, c in enumerate(sorted_cars) if c == car), -1)
-            
-            # DRS rules: Active after 3 laps by leader, within 1s of car ahead AND leader, on designated straight only
-            leader = sorted_cars[0] if sorted_cars else None
-            if leader and leader.laps_completed >= 3 and car_position > 0:
-                track_length = self.track['total_length']
-                
-                # Define DRS zone: specific straight section (e.g., bottom straight from T8 to T9)
-                # Using track position normalized to 0-1, DRS zone is roughly 0.35-0.45 of track length
-                # This corresponds to the long bottom straight section
-                drs_zone_start = 0.35 * track_length
-                drs_zone_end = 0.45 * track_length
-                
-                # Check if car is in DRS zone (accounting for lap wrapping)
-                car_s_normalized = car.s % track_length
-                in_drs_zone = drs_zone_start <= car_s_normalized <= drs_zone_end
-                
-                if in_drs_zone:
-                    car_ahead = sorted_cars[car_position - 1]
-                    # Calculate time gap to car ahead (positive if car is behind)
-                    lap_diff = car.laps_completed - car_ahead.laps_completed
-                    distance_gap = (lap_diff * track_length) + (car_ahead.s - car.s)
-                    # Convert distance gap to time gap using current speed
-                    if car.v > 0.1:
-                        time_gap_ahead = distance_gap / car.v
-                    else:
-                        time_gap_ahead = 999.0  # Very large gap if car is stopped
-                    
-                    # Calculate time gap to leader
-                    leader_lap_diff = car.laps_completed - leader.laps_completed
-                    leader_distance_gap = (leader_lap_diff * track_length) + (leader.s - car.s)
-                    if car.v > 0.1:
-                        time_gap_leader = leader_distance_gap / car.v
-                    else:
-                        time_gap_leader = 999.0
-                    
-                    # DRS active if within 1 second of car ahead AND within 1 second of leader
-                    if 0 < time_gap_ahead <= 1.0 and 0 < time_gap_leader <= 1.0:
-                        car.drs_active = True
-            
-            # Apply defensive behavior: slower cars hold up faster ones
-            defensive_speed_multiplier = 1.0
-            if not car.on_pit:
-                # Use sorted leaderboard to find car directly behind
-                car_position = next((i for i, c in enumerate(sorted_cars) if c == car), -1)
-                if car_position < len(sorted_cars) - 1:
-                    # There's a car behind
-                    car_behind = sorted_cars[car_position + 1]
-                    if not car_behind.on_pit:
-                        track_length = self.track['total_length']
-                        
-                        # Calculate distance gap (car ahead - car behind)
-                        lap_diff = car.laps_completed - car_behind.laps_completed
-                        distance_gap = (lap_diff * track_length) + (car.s - car_behind.s)
-                        
-                        # Normalize to handle lap wrapping
-                        if distance_gap < 0:
-                            distance_gap += track_length
-                        if distance_gap > track_length / 2:
-                            distance_gap = track_length - distance_gap
-                        
-                        # Calculate time gap (how long until car_behind reaches car's position)
-                        if car.v > 0.1 and distance_gap > 0:
-                            time_gap = distance_gap / car.v
-                            
-                            # If car behind is within 0.5-3 seconds and on a straight/low-curvature section
-                            # Made overtaking more difficult by extending range and increasing reduction
-                            if 0.5 <= time_gap <= 3.0 and curv < 0.001:  # Only on straights
-                                # Apply speed reduction: closer = more effect (2-8% max, increased from 2-5%)
-                                # Scale from 0.98 (at 3s gap) to 0.92 (at 0.5s gap)
-                                reduction_factor = 0.98 - (0.06 * (3.0 - time_gap) / 2.5)
-                                defensive_speed_multiplier = min(defensive_speed_multiplier, reduction_factor)
-            
-            # Lookahead to anticipate upcoming corners
-            lookahead_distance = car.v * 2.0  # Look 2 seconds ahead
-            u_ahead = self.track['s_to_u'](car.s + lookahead_distance)
-            curv_ahead = self.track['curv'](u_ahead)
-            
-            v_corner = self.cornering_speed(car, curv)
-            v_corner_ahead = self.cornering_speed(car, curv_ahead)
-            v_straight = self.straight_speed(car)  # This now includes DRS boost if active
-            
-            # Apply defensive speed multiplier
-            v_straight *= defensive_speed_multiplier
-            
-            # Use the more restrictive speed limit (current corner or upcoming corner)
-            target_v = min(v_straight, v_corner, v_corner_ahead)
-            
-            # More aggressive braking when exceeding cornering speed
-            if car.v > target_v:
-                # Brake harder if significantly over speed limit
-                speed_excess = car.v - target_v
-                if speed_excess > 5.0:
-                    car.v -= 20.0 * self.dt  # Hard braking
+        dt = self.dt
+        track_length = self.track['total_length']
+        weather = weather_factors(self.weather)
+        n = len(self.cars)
+        if n == 0:
+            self.time += dt
+            return
+
+        # Calculate leaderboard once per step for DRS and defensive behaviour
+        self.get_leaderboard()
+        order = self.sorted_order
+        rank = self.positions
+
+        # Cars in the pit lane count down and rejoin on fresh tyres
+        in_pit = self.on_pit.copy()
+        self.pit_counter[in_pit] -= dt
+        for i in np.flatnonzero(in_pit & (self.pit_counter <= 0)):
+            car = self.cars[i]
+            car.on_pit = False
+            car.pit_counter = 0
+            # Select tyre based on weather and laps remaining
+            rain = weather.rain
+            laps_remaining = self.total_laps - car.laps_completed
+            if rain > 0.6:
+                car.tyre = 'WET'
+            elif rain > 0.3:
+                car.tyre = 'INTERMEDIATE'
+            else:
+                # Prefer softer compounds when race is ending soon
+                if laps_remaining < 5:
+                    car.tyre = 'SOFT'  # Push for fastest lap times
+                elif laps_remaining < 10:
+                    car.tyre = ('SOFT', 'MEDIUM')[self.rng.integers(2)]  # Prefer softer
                 else:
-                    car.v -= 15.0 * self.dt  # Moderate braking
-            elif car.v < target_v:
-                # Accelerate only if well below target
-                car.v += 6.0 * self.dt
-            
-            # Cap speed to target_v (respects cornering limits)
-            car.v = max(0.0, min(car.v, target_v))
-            
-            # Apply error speed reduction if driver is in error state
-            if car.error_active:
-                car.v *= car.error_speed_multiplier
-                car.error_timer -= self.dt
-                if car.error_timer <= 0:
-                    # Error state expired, reset
-                    car.error_active = False
-                    car.error_timer = 0.0
-                    car.error_speed_multiplier = 1.0
-
-            # Check for pitstop based on probability
-            if not car.on_pit and random.random() < self.pitstop_probability(car) * self.dt:
+                    car.tyre_idx = self.rng.integers(N_DRY_TYRES)
+            # Update pitstop history with new tyre
+            if car.pitstop_history:
+                car.pitstop_history[-1]['new_tyre'] = car.tyre
+            # Finalize undercut battles where this driver is the second to pit
+            self.finalize_undercut_battles(car)
+            car.wear = 0.0  # Reset wear for new tyres
+            # Reset tire temperature to slightly above ambient (new tyres start warm)
+            car.tire_temp = max(80.0, weather.ambient_temp + 55.0)  # New tyres start at realistic F1 temp
+            car.position_before_pitstop = None  # Reset tracking
+            car.pitstop_lap = None  # Reset pitstop lap tracking
+
+        # Speed, wear, temperature, fuel and position of the cars on track
+        moving = ~in_pit
+        if NUMBA_AVAILABLE:
+            kernel = _step_kernel_parallel if n >= PARALLEL_STEP_MIN_CARS else _step_kernel
+            kernel(self.s, self.v, self.wear, self.fuel, self.tire_temp, self.laps_completed,
+                   self.next_lap_s, moving, self.on_pit, self.drs_active, self.tyre_idx,
+                   self.error_active, self.error_timer, self.error_speed_multiplier,
+                   self.driver_skill, self.car_skill, order, rank,
+                   self.track['curv_of_s'], self.track['inv_dx'],
+                   track_length, TYRE_BASE_ARR, TYRE_WEAR_ARR, TYRE_HEAT_ARR,
+                   weather.tyre_grip, weather.straight_speed, weather.cornering_speed,
+                   weather.cooling, weather.rain_cooling, weather.ambient_temp, dt)
+        else:
+            self._advance_cars_np(moving, order, rank, weather)
+
+        # Check if race is complete
+        if np.any(self.laps_completed >= self.total_laps):
+            self.race_finished = True
+
+        # Pitstop decisions; only cars past 80% wear with more than 3 laps to
+        # go have a non-zero pitstop_probability
+        pit_candidates = moving & (self.wear >= 0.8) & (self.total_laps - self.laps_completed > 3)
+
+        # Positions after moving, plus intervals when a car may pit this step
+        self.get_leaderboard()
+        if pit_candidates.any():
+            self.update_gap_table()
+
+        # Random numbers for this step's pitstop and error decisions
+        r_pit, r_error, r_error_kind = self.rng.random((3, n))
+
+        for i in np.flatnonzero(pit_candidates):
+            car = self.cars[i]
+            if r_pit[i] < self.pitstop_probability(car) * dt:
                 car.on_pit = True
                 # Generate variable pitstop time
-                pit_time = get_pitstop_time()
+                pit_time = get_pitstop_time(self.rng)
                 car.pit_counter = pit_time
                 # Record position before pitstop
-                sorted_cars = self.get_leaderboard()
                 car.position_before_pitstop = car.position
                 car.pitstop_lap = car.laps_completed
                 # Check for nearby drivers to create pending undercut battles
@@ -742,142 +1123,219 @@ class RaceSim:
                     'undercuts': {}  # Will be populated when both drivers have pitted
                 })
 
-            # Driver error handling: temporary speed reduction with varying severity
-            if not car.error_active and random.random() < self.error_probability(car) * self.dt:
-                # Determine error type and severity
-                rand_val = random.random()
-                if rand_val < 0.40:  # 40% - Lockup (least severe)
-                    error_type = "lockup"
-                    error_msg = f"{car.name} locks up!"
-                    car.error_speed_multiplier = 0.85  # 15% speed reduction
-                    car.error_timer = random.uniform(1.5, 2.5)
-                    time_loss = random.uniform(0.5, 1.5)
-                elif rand_val < 0.75:  # 35% - Goes wide (moderate)
-                    error_type = "wide"
-                    error_msg = f"{car.name} goes wide!"
-                    car.error_speed_multiplier = 0.75  # 25% speed reduction
-                    car.error_timer = random.uniform(2.0, 3.5)
-                    time_loss = random.uniform(1.0, 2.5)
-                elif rand_val < 0.95:  # 20% - Gravel excursion (severe)
-                    error_type = "gravel"
-                    error_msg = f"{car.name} runs into the gravel!"
-                    car.error_speed_multiplier = 0.50  # 50% speed reduction
-                    car.error_timer = random.uniform(3.0, 5.0)
-                    time_loss = random.uniform(3.0, 6.0)
-                else:  # 5% - Spin (most severe)
-                    error_type = "spin"
-                    error_msg = f"{car.name} spins!"
-                    car.error_speed_multiplier = 0.20  # 80% speed reduction
-                    car.error_timer = random.uniform(4.0, 7.0)
-                    time_loss = random.uniform(5.0, 10.0)
-                
-                # Trigger error state
-                car.error_active = True
-                
-                # Add time penalty to total_time
-                car.total_time += time_loss
-                
-                # Log error to race events for race log display
-                self.race_events.append({
-                    'type': 'error',
-                    'time': round(self.time, 1),
-                    'lap': car.laps_completed,
-                    'driver': car.name,
-                    'error_type': error_type,
-                    'time_loss': round(time_loss, 2),
-                    'message': error_msg,
-                    'track_position': round(car.s, 1)
-                })
-                
-                # Console log for debugging
-                print(f"[Lap {car.laps_completed}] {error_msg} (-{time_loss:.2f}s)")
-
-            # Tyre wear calculation with compound-specific rates
-            base_wear_rate = 0.0005 * (1 + 0.8 * (1 - self.tyre_grip_coeff(car)))
-            wear_rate_multiplier = TYRE_WEAR_RATES.get(car.tyre, 1.0)
-            # DRS wear penalty: 5% increase when DRS is active
-            if getattr(car, 'drs_active', False):
-                wear_rate_multiplier *= 1.05
-            car.wear += base_wear_rate * wear_rate_multiplier * self.dt
-            car.wear = min(car.wear, 0.99)
-            
-            # Update tire temperature based on speed, cornering, and compound
-            ambient_temp = self.weather.get('track_temp', 25.0)
-            heat_factor = TYRE_HEAT_FACTORS.get(car.tyre, 1.0)
-            
-            # Determine if car is cornering (high curvature) or on straight (low curvature)
-            is_cornering = curv > 0.002  # Threshold for cornering vs straight
-            is_straight = curv < 0.0005  # Threshold for straight sections
-            
-            # Heat generation: much higher during cornering due to lateral forces
-            if is_cornering:
-                # Cornering generates significant heat from lateral forces
-                # Heat scales with speed squared and curvature
-                cornering_heat = 2.5 * (car.v ** 2) * curv * heat_factor
-                # Additional heat from speed
-                speed_heat = 0.3 * car.v * heat_factor
-                heat_gen = cornering_heat + speed_heat
-            elif is_straight:
-                # Straights generate minimal heat (mostly from rolling resistance)
-                heat_gen = 0.15 * car.v * heat_factor
-            else:
-                # Transition zones (medium curvature)
-                heat_gen = 0.8 * car.v * abs(curv) * 100 * heat_factor
-            
-            # Cooling: less aggressive, allows temperature to build up
-            # Cooling rate increases with speed (more airflow on straights)
-            cooling_rate = 0.02 if is_cornering else 0.08  # Less cooling in corners, more on straights
+        # Driver error handling: temporary speed reduction with varying severity
+        erring = moving & ~self.error_active & (r_error < self.error_probabilities(weather) * dt)
+        for i in np.flatnonzero(erring):
+            car = self.cars[i]
+            # Determine error type and severity
+            rand_val = r_error_kind[i]
+            if rand_val < 0.40:  # 40% - Lockup (least severe)
+                error_type = "lockup"
+                error_msg = f"{car.name} locks up!"
+                car.error_speed_multiplier = 0.85  # 15% speed reduction
+                car.error_timer = self.rng.uniform(1.5, 2.5)
+                time_loss = self.rng.uniform(0.5, 1.5)
+            elif rand_val < 0.75:  # 35% - Goes wide (moderate)
+                error_type = "wide"
+                error_msg = f"{car.name} goes wide!"
+                car.error_speed_multiplier = 0.75  # 25% speed reduction
+                car.error_timer = self.rng.uniform(2.0, 3.5)
+                time_loss = self.rng.uniform(1.0, 2.5)
+            elif rand_val < 0.95:  # 20% - Gravel excursion (severe)
+                error_type = "gravel"
+                error_msg = f"{car.name} runs into the gravel!"
+                car.error_speed_multiplier = 0.50  # 50% speed reduction
+                car.error_timer = self.rng.uniform(3.0, 5.0)
+                time_loss = self.rng.uniform(3.0, 6.0)
+            else:  # 5% - Spin (most severe)
+                error_type = "spin"
+                error_msg = f"{car.name} spins!"
+                car.error_speed_multiplier = 0.20  # 80% speed reduction
+                car.error_timer = self.rng.uniform(4.0, 7.0)
+                time_loss = self.rng.uniform(5.0, 10.0)
             
-            # Rain increases cooling rate - tyres cool faster in wet conditions
-            rain = self.weather.get('rain', 0.0)
-            rain_cooling_factor = 1.0 + (rain * 0.5)  # Up to 50% more cooling in heavy rain
-            cooling_rate *= rain_cooling_factor
+            # Trigger error state
+            car.error_active = True
             
-            cooling = cooling_rate * (car.tire_temp - ambient_temp) * (1 + car.v * 0.01)
+            # Add time penalty to total_time
+            car.total_time += time_loss
             
-            # Additional rain cooling effect - water on track cools tyres more
-            if rain > 0:
-                rain_cooling = rain * 0.15 * (car.tire_temp - ambient_temp) * self.dt
-                cooling += rain_cooling
-            
-            # Temperature change
-            dtemp = (heat_gen - cooling) * self.dt
-            car.tire_temp = max(ambient_temp + 20, min(car.tire_temp + dtemp, 150.0))
+            # Log error to race events for race log display
+            self.race_events.append({
+                'type': 'error',
+                'time': round(self.time, 1),
+                'lap': car.laps_completed,
+                'driver': car.name,
+                'error_type': error_type,
+                'time_loss': round(time_loss, 2),
+                'message': error_msg,
+                'track_position': round(car.s, 1)
+            })
             
-            car.fuel -= 0.02 * self.dt
-            if car.fuel < 0:
-                car.fuel = 0
-
-            car.s += car.v * self.dt
-
-            L = self.track['total_length']
-            if (car.s // L) > ((car.s - car.v * self.dt) // L):
-                car.laps_completed += 1
-                # Check if race is complete (72 laps)
-                if car.laps_completed >= self.total_laps:
-                    self.race_finished = True
+            # Console log for debugging
+            print(f"[Lap {car.laps_completed}] {error_msg} (-{time_loss:.2f}s)")
 
         # Calculate intervals after all cars have moved
-        sorted_cars = self.get_leaderboard()
-        leader = sorted_cars[0] if sorted_cars else None
-        if leader:
-            track_length = self.track['total_length']
-            for car in sorted_cars:
-                # Time interval
-                car.time_interval = car.total_time - leader.total_time
-                # Distance interval (accounting for lap differences)
-                lap_diff = car.laps_completed - leader.laps_completed
-                distance_interval = (lap_diff * track_length) + (car.s - leader.s)
-                car.distance_interval = distance_interval
+        self.get_leaderboard()
+        self.update_intervals()
 
         self.time += self.dt
 
+    def _advance_cars_np(self, moving, order, rank, weather):
+        """
+        NumPy version of _step_kernel: update speed, DRS, error state, tyre
+        wear and temperature, fuel and position of the cars on track.
+
+        Args:
+            moving: Boolean mask of cars on track this step
+            order: Car indices in leaderboard order
+            rank: Leaderboard position (0-based) of each car
+            weather: WeatherFactors for this step
+        """
+        dt = self.dt
+        track_length = self.track['total_length']
+        n = len(self.cars)
+
+        curv = self.track['curv_at_s'](self.s)
+
+        # Time gaps use current speed; stopped cars count as very far away
+        rolling = self.v > 0.1
+        safe_v = np.where(rolling, self.v, 1.0)
+        leader = order[0]
+        ahead = order[np.maximum(rank - 1, 0)]
+        behind = order[np.minimum(rank + 1, n - 1)]
+
+        # DRS rules: Active after 3 laps by leader, within 1s of car ahead AND leader, on designated straight only
+        # DRS zone is the long bottom straight (T8 to T9), roughly 0.35-0.45 of track length
+        distance_gap_ahead = ((self.laps_completed - self.laps_completed[ahead]) * track_length
+                              + (self.s[ahead] - self.s))
+        time_gap_ahead = np.where(rolling, distance_gap_ahead / safe_v, 999.0)
+        leader_distance_gap = ((self.laps_completed - self.laps_completed[leader]) * track_length
+                               + (self.s[leader] - self.s))
+        time_gap_leader = np.where(rolling, leader_distance_gap / safe_v, 999.0)
+        s_normalized = self.s % track_length
+        drs = ((rank > 0) & (self.laps_completed[leader] >= 3)
+               & (s_normalized >= 0.35 * track_length) & (s_normalized <= 0.45 * track_length)
+               & (time_gap_ahead > 0) & (time_gap_ahead <= 1.0)
+               & (time_gap_leader > 0) & (time_gap_leader <= 1.0))
+        self.drs_active[moving] = drs[moving]
+
+        # Apply defensive behavior: slower cars hold up faster ones when the
+        # car directly behind is within 0.5-3 seconds on a straight
+        distance_gap_behind = ((self.laps_completed - self.laps_completed[behind]) * track_length
+                               + (self.s - self.s[behind]))
+        # Normalize to handle lap wrapping
+        distance_gap_behind = np.where(distance_gap_behind < 0,
+                                       distance_gap_behind + track_length, distance_gap_behind)
+        distance_gap_behind = np.where(distance_gap_behind > track_length / 2,
+                                       track_length - distance_gap_behind, distance_gap_behind)
+        time_gap_behind = distance_gap_behind / safe_v
+        defending = ((rank < n - 1) & ~self.on_pit[behind] & rolling & (distance_gap_behind > 0)
+                     & (time_gap_behind >= 0.5) & (time_gap_behind <= 3.0) & (curv < 0.001))
+        # Scale from 0.98 (at 3s gap) to 0.92 (at 0.5s gap)
+        defensive_speed_multiplier = np.where(defending, 0.98 - (0.06 * (3.0 - time_gap_behind) / 2.5), 1.0)
+
+        # Lookahead to anticipate upcoming corners (2 seconds ahead)
+        curv_ahead = self.track['curv_at_s'](self.s + self.v * 2.0)
+
+        grip = self.grip_coeffs(weather)
+        # Cornering speed falls with curvature, so the tighter of the current
+        # and upcoming corner gives the lower limit of the two
+        v_corner = self.cornering_speeds(weather, grip, np.maximum(curv, curv_ahead))
+        v_straight = self.straight_speeds(weather, grip) * defensive_speed_multiplier  # Includes DRS boost
+
+        # Use the most restrictive speed limit (straight, current corner or upcoming corner)
+        target_v = np.minimum(v_straight, v_corner)
+
+        # Brake harder if significantly over speed limit, accelerate if below it,
+        # then cap speed to target_v (respects cornering limits)
+        brake = np.where(self.v - target_v > 5.0, 20.0 * dt, 15.0 * dt)
+        v = np.where(self.v > target_v, self.v - brake,
+                     np.where(self.v < target_v, self.v + 6.0 * dt, self.v))
+        v = np.maximum(0.0, np.minimum(v, target_v))
+
+        # Apply error speed reduction if driver is in error state
+        erring = moving & self.error_active
+        v[erring] *= self.error_speed_multiplier[erring]
+        self.error_timer[erring] -= dt
+        expired = erring & (self.error_timer <= 0)
+        self.error_active[expired] = False
+        self.error_timer[expired] = 0.0
+        self.error_speed_multiplier[expired] = 1.0
+        self.v[moving] = v[moving]
+
+        # Wear, tyre temperature, fuel and position of the cars on track,
+        # each read and written once over the gathered subset
+        idx = np.flatnonzero(moving)
+        tyre = self.tyre_idx[idx]
+        v = self.v[idx]
+        curv = curv[idx]
+        wear = self.wear[idx]
+        tire_temp = self.tire_temp[idx]
+
+        # Tyre wear with compound-specific rates (5% extra with DRS active)
+        base_wear_rate = 0.0005 * (1 + 0.8 * (1 - grip[idx]))
+        wear_rate_multiplier = TYRE_WEAR_ARR[tyre] * np.where(self.drs_active[idx], 1.05, 1.0)
+        self.wear[idx] = np.minimum(wear + base_wear_rate * wear_rate_multiplier * dt, 0.99)
+
+        # Tire temperature: heat from speed and cornering load, cooling from
+        # airflow and rain
+        ambient_temp = weather.ambient_temp
+        heat_factor = TYRE_HEAT_ARR[tyre]
+        is_cornering = curv > 0.002  # Threshold for cornering vs straight
+        is_straight = curv < 0.0005  # Threshold for straight sections
+        heat_gen = np.where(
+            is_cornering,
+            # Cornering heat scales with speed squared and curvature, plus speed heat
+            2.5 * (v ** 2) * curv * heat_factor + 0.3 * v * heat_factor,
+            np.where(
+                is_straight,
+                # Straights generate minimal heat (mostly from rolling resistance)
+                0.15 * v * heat_factor,
+                # Transition zones (medium curvature)
+                0.8 * v * np.abs(curv) * 100 * heat_factor,
+            ),
+        )
+        # Less cooling in corners, more on straights; up to 50% more in heavy rain
+        excess = tire_temp - ambient_temp
+        cooling_rate = np.where(is_cornering, 0.02, 0.08) * weather.cooling
+        cooling = cooling_rate * excess * (1 + v * 0.01)
+        # Additional rain cooling effect - water on track cools tyres more
+        cooling += weather.rain_cooling * excess * dt
+        self.tire_temp[idx] = np.clip(tire_temp + (heat_gen - cooling) * dt, ambient_temp + 20, 150.0)
+
+        self.fuel[idx] = np.maximum(self.fuel[idx] - 0.02 * dt, 0.0)
+
+        # A lap is completed when the distance reaches the car's next multiple
+        # of the track length
+        s = self.s[idx] + v * dt
+        self.s[idx] = s
+        crossed = idx[s >= self.next_lap_s[idx]]
+        self.laps_completed[crossed] += 1
+        self.next_lap_s[crossed] += track_length
+
     def get_leaderboard(self):
-        sorted_cars = sorted(self.cars, 
-                           key=lambda c: (-c.laps_completed, -c.s, c.total_time))
+        """
+        Sort cars by laps (desc), distance (desc), then total time (asc).
+
+        Also refreshes self.sorted_order (car indices in race order) and
+        self.positions (0-based race position of each car index).
+        """
+        # lexsort uses the last key as the primary one
+        order = np.lexsort((self.total_time, -self.s, -self.laps_completed))
+        # Most calls see no overtakes: positions are already up to date (a
+        # bytes compare is much cheaper than np.array_equal on 20 entries)
+        if self._sorted_cars is not None and order.tobytes() == self.sorted_order.tobytes():
+            return list(self._sorted_cars)
+        positions = np.empty(len(order), dtype=np.int64)
+        positions[order] = np.arange(len(order))
+        self.sorted_order = order
+        self.positions = positions
+        sorted_cars = [self.cars[i] for i in order]
         for i, c in enumerate(sorted_cars):
             c.position = i + 1
-        return sorted_cars
+        self._sorted_cars = sorted_cars
+        return list(sorted_cars)
     
     def check_for_pending_undercuts(self, car):
         """
@@ -918,9 +1376,8 @@ class RaceSim:
             is_adjacent = position_diff <= 2  # Adjacent or within 2 positions
             
             # Check if they're on similar tire compounds (both on same compound type)
-            tire_types_match = (current_tire == other_car.tyre) or \
-                              (current_tire in ['SOFT', 'MEDIUM', 'HARD'] and 
-                               other_car.tyre in ['SOFT', 'MEDIUM', 'HARD'])
+            tire_types_match = (car.tyre_idx == other_car.tyre_idx) or \
+                              (car.tyre_idx < N_DRY_TYRES and other_car.tyre_idx < N_DRY_TYRES)
             
             # Only create pending undercut if:
             # 1. They're racing closely (within 5 seconds - strategic window)
@@ -1042,6 +1499,7 @@ class RaceSim:
                         'tire_factor': round(tire_factor, 3),
                         'undercut_type': 'success' if undercut_time > 0 else 'failed'  # A's perspective
                     }
+                    driver_a._undercut_summary = None
                     break
             
             # Store for Driver B (the one who got undercut or defended)
@@ -1063,6 +1521,7 @@ class RaceSim:
                     'tire_factor': round(-tire_factor, 3),
                     'undercut_type': 'undercut' if undercut_time > 0 else 'defended'  # B's perspective
                 }
+                driver_b._undercut_summary = None
             
             # Remove finalized battle from pending list
             self.pending_undercuts.pop(idx)
@@ -1350,44 +1809,112 @@ class RaceSim:
             'race_events': []  # Not tracked per driver in current simulation
         }
     
+    def snapshot_all(self):
+        """
+        Serialize every car in one pass over the state arrays.
+
+        Positions, headings and rounded numeric fields are computed for the
+        whole field at once; only the dict assembly is per car.
+
+        Returns:
+            List of CarState.to_dict()-compatible dicts, in self.cars order
+        """
+        xs, ys, angles = self.track['pose_at_s'](self.s)
+        # Round float32 state in float64 so it serializes as e.g. 0.123
+        columns = zip(
+            xs.tolist(), ys.tolist(), angles.tolist(),
+            self.laps_completed.tolist(),
+            [TYRE_NAMES[i] for i in self.tyre_idx.tolist()],
+            np.round(self.wear.astype(np.float64), 3).tolist(),
+            np.round(self.fuel.astype(np.float64), 1).tolist(),
+            np.round(self.v.astype(np.float64) * 3.6, 1).tolist(),  # km/h
+            np.round(self.total_time, 2).tolist(),
+            self.on_pit.tolist(),
+            np.round(self.tire_temp.astype(np.float64), 1).tolist(),
+            self.drs_active.tolist(),
+            np.round(self.time_interval, 3).tolist(),
+            np.round(self.distance_interval, 1).tolist(),
+            np.round(self.gap_ahead, 3).tolist(),
+            np.round(self.distance_gap_ahead, 1).tolist(),
+        )
+
+        cars = []
+        for car, (x, y, angle, laps, tyre, wear, fuel, speed, total_time, on_pit, tire_temp, drs_active,
+                  time_interval, distance_interval, gap_ahead, distance_gap_ahead) in zip(self.cars, columns):
+            cars.append({
+                'name': car.name,
+                'color': car.color,
+                'position': car.position or 0,
+                'laps': laps,
+                'wear': wear,
+                'tyre': tyre,
+                'fuel': fuel,
+                'speed': speed,
+                'x': x,
+                'y': y,
+                'angle': angle,
+                'total_time': total_time,
+                'on_pit': on_pit,
+                # Enhanced physics parameters
+                'rpm': round(car.engine_rpm, 0),
+                'gear': car.gear,
+                'throttle': round(car.throttle, 2),
+                'brake': round(car.brake_pressure, 2),
+                'tire_temp': tire_temp,
+                'drs_active': drs_active,
+                'ers_energy': round(car.ers_energy, 1),
+                'controller_type': car.controller_type,
+                'overtaking': car.overtaking,
+                'aero_downforce': round(car.aero_downforce, 0),
+                'pitstop_history': car.pitstop_history,
+                'pitstop_count': car.pitstop_count,
+                'time_interval': time_interval,
+                'distance_interval': distance_interval,
+                'gap_ahead': gap_ahead,
+                'distance_gap_ahead': distance_gap_ahead,
+                'undercut_summary': car._get_undercut_summary()
+            })
+        return cars
+
+    def update_intervals(self):
+        """
+        Gaps of every car to the leader and to the car ahead.
+
+        Uses the cached leaderboard, so call after get_leaderboard(). Sets
+        time_interval/distance_interval (from the leader) and
+        gap_ahead/distance_gap_ahead (from the car ahead, 0 for the leader).
+        """
+        order = self.sorted_order
+        if len(order) == 0:
+            return
+        track_length = self.track['total_length']
+
+        # Intervals from the leader (accounting for lap differences)
+        leader = order[0]
+        self.time_interval[:] = np.maximum(0.0, self.total_time - self.total_time[leader])
+        self.distance_interval[:] = ((self.laps_completed - self.laps_completed[leader]) * track_length
+                                     + (self.s - self.s[leader]))
+
+        # Gap to the car ahead (for better display)
+        car, ahead = order[1:], order[:-1]
+        self.gap_ahead[leader] = 0.0
+        self.distance_gap_ahead[leader] = 0.0
+        self.gap_ahead[car] = np.maximum(0.0, self.total_time[car] - self.total_time[ahead])
+        self.distance_gap_ahead[car] = ((self.laps_completed[car] - self.laps_completed[ahead]) * track_length
+                                        + (self.s[ahead] - self.s[car]))
+
     def get_state(self):
         """Get complete race state for WebSocket broadcast"""
-        sorted_cars = self.get_leaderboard()
-        
         # Calculate intervals (gaps from leader and car ahead)
-        leader = sorted_cars[0] if sorted_cars else None
-        if leader:
-            for i, car in enumerate(sorted_cars):
-                # Time interval from leader
-                car.time_interval = max(0.0, car.total_time - leader.total_time)
-                
-                # Distance interval from leader (accounting for lap differences)
-                track_length = self.track['total_length']
-                lap_diff = car.laps_completed - leader.laps_completed
-                distance_interval = (lap_diff * track_length) + (car.s - leader.s)
-                car.distance_interval = distance_interval
-                
-                # Calculate gap to car ahead (for better display)
-                if i > 0:
-                    car_ahead = sorted_cars[i - 1]
-                    # Time gap to car ahead
-                    car.gap_ahead = max(0.0, car.total_time - car_ahead.total_time)
-                    # Distance gap to car ahead
-                    lap_diff_ahead = car.laps_completed - car_ahead.laps_completed
-                    distance_gap_ahead = (lap_diff_ahead * track_length) + (car_ahead.s - car.s)
-                    car.distance_gap_ahead = distance_gap_ahead
-                else:
-                    # Leader has no car ahead
-                    car.gap_ahead = 0.0
-                    car.distance_gap_ahead = 0.0
+        self.get_leaderboard()
+        self.update_intervals()
         
-        tyre_counts = {}
-        for c in self.cars:
-            tyre_counts[c.tyre] = tyre_counts.get(c.tyre, 0) + 1
+        counts = np.bincount(self.tyre_idx, minlength=len(TYRE_NAMES)).tolist()
+        tyre_counts = {name: count for name, count in zip(TYRE_NAMES, counts) if count}
         
         state = {
             'time': round(self.time, 1),
-            'cars': [car.to_dict(self.track) for car in self.cars],
+            'cars': self.snapshot_all(),
             'weather': self.weather,
             'total_laps': self.total_laps,
             'tyre_distribution': tyre_counts,
@@ -1412,30 +1939,59 @@ class RaceSim:
         self.paused = False
         self.speed_multiplier = 1.0
         self.race_events = []  # Clear race events
-        # Reset all cars
+        # Fresh random starting dry tyres for the whole grid
+        self.tyre_idx[:] = self.rng.integers(N_DRY_TYRES, size=len(self.cars))
+        # Reset the numeric state of the whole grid in the shared arrays
+        n = len(self.cars)
+        # F1 grid start: all cars start at same position with 2m spacing
+        self.s[:] = np.arange(n) * 2.0
+        self.v[:] = 0.0
+        self.laps_completed[:] = 0
+        self.total_time[:] = 0.0
+        self.wear[:] = 0.0
+        self.fuel[:] = 100.0
+        self.on_pit[:] = False
+        self.pit_counter[:] = 0.0
+        ambient_temp = self.weather.get('track_temp', 25.0)
+        self.tire_temp[:] = max(80.0, ambient_temp + 55.0)  # Reset to realistic F1 tire temp
+        # Reset error state
+        self.error_active[:] = False
+        self.error_timer[:] = 0.0
+        self.error_speed_multiplier[:] = 1.0
+        # Per-car pitstop bookkeeping
         for car in self.cars:
-            car.s = 0.0
-            car.v = 0.0
-            car.laps_completed = 0
-            car.total_time = 0.0
-            car.wear = 0.0
-            car.fuel = 100.0
-            car.on_pit = False
-            car.pit_counter = 0.0
             car.pitstop_history = []
             car.pitstop_count = 0
+            car._undercut_summary = None
             car.position_before_pitstop = None
             car.pitstop_lap = None
-            car.tyre = random.choice(['SOFT', 'MEDIUM', 'HARD'])
-            ambient_temp = self.weather.get('track_temp', 25.0)
-            car.tire_temp = max(80.0, ambient_temp + 55.0)  # Reset to realistic F1 tire temp
-            # Reset error state
-            car.error_active = False
-            car.error_timer = 0.0
-            car.error_speed_multiplier = 1.0
-            # F1 grid start: all cars start at same position with 2m spacing
-            car_index = self.cars.index(car)
-            car.s = car_index * 2.0  # 2 meters between consecutive cars
+        self.reset_lap_targets()
+    
+    def reset_lap_targets(self):
+        """Set next_lap_s to the first multiple of the track length past each car's s"""
+        track_length = self.track['total_length']
+        self.next_lap_s[:] = (self.s // track_length + 1) * track_length
+
+def prewarm_kernels():
+    """
+    Compile (or load from the on-disk cache) RaceSim's step kernel up front,
+    so the first race tick after a client connects doesn't stall on JIT.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    state = SimpleNamespace()
+    allocate_car_arrays(state, 1)
+    index = np.zeros(1, dtype=np.int64)
+    weather = weather_factors({})
+    _step_kernel(state.s, state.v, state.wear, state.fuel, state.tire_temp, state.laps_completed,
+                 state.next_lap_s, np.ones(1, dtype=bool), state.on_pit, state.drs_active, state.tyre_idx,
+                 state.error_active, state.error_timer, state.error_speed_multiplier,
+                 state.driver_skill, state.car_skill, index, index,
+                 np.zeros(2), 1.0, 1.0, TYRE_BASE_ARR, TYRE_WEAR_ARR, TYRE_HEAT_ARR,
+                 weather.tyre_grip, weather.straight_speed, weather.cornering_speed,
+                 weather.cooling, weather.rain_cooling, weather.ambient_temp, 0.5)
+
+prewarm_kernels()
 
 # -------------------- FastAPI + WebSocket Server --------------------
 
@@ -1450,18 +2006,127 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ClientChannel(NamedTuple):
+    """Outbound side of one WebSocket client"""
+    wire_format: str  # 'json' or 'msgpack', optionally with a '+zlib' suffix
+    queue: asyncio.Queue  # Pending state frames, newest last
+
+# Frames a client may have queued before older ones are dropped
+CLIENT_QUEUE_SIZE = 2
+
+# zlib level for '+zlib' frames: fastest, since it runs every broadcast
+FRAME_COMPRESS_LEVEL = 1
+
 # Active WebSocket connections
-active_connections: Set[WebSocket] = set()
+active_connections: Dict[WebSocket, ClientChannel] = {}
+# Set while active_connections is non-empty; simulation_loop parks on it
+has_clients = asyncio.Event()
 
 # Global simulation instance
 sim: RaceSim = None
 track_data = None
+track_frames = {}  # wire format -> encoded track message, cleared with track_data
+state_frames = {}  # wire format -> last broadcast state frame
+
+def client_wire_format(websocket: WebSocket) -> str:
+    """
+    Wire format a client asked for: 'msgpack' via ?format=msgpack or the
+    'msgpack' subprotocol (when msgpack is installed), otherwise 'json'.
+    ?compress=zlib adds a '+zlib' suffix for precompressed binary frames.
+    """
+    wire_format = 'json'
+    if msgpack is not None and (websocket.query_params.get('format') == 'msgpack'
+                                or 'msgpack' in websocket.scope.get('subprotocols', [])):
+        wire_format = 'msgpack'
+    if websocket.query_params.get('compress') == 'zlib':
+        wire_format += '+zlib'
+    return wire_format
+
+def encode_frame(message, wire_format):
+    """
+    Serialize a message once for every client using wire_format.
+
+    Returns:
+        bytes for 'msgpack' and '+zlib' formats (sent as a binary frame),
+        str for 'json' (text frame)
+    """
+    if wire_format.endswith('+zlib'):
+        # Compressed once here and shared by every such client, rather than
+        # deflated per connection
+        payload = encode_frame(message, wire_format[:-len('+zlib')])
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        return zlib.compress(payload, FRAME_COMPRESS_LEVEL)
+    if wire_format == 'msgpack':
+        return msgpack.packb(message, use_bin_type=True)
+    if orjson is not None:
+        # Text frames for the dashboard's JSON.parse, so decode the UTF-8 bytes
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, separators=(',', ':'), ensure_ascii=False)
+
+async def send_frame(websocket: WebSocket, frame):
+    """Send a frame from encode_frame"""
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+def offer_frame(queue: asyncio.Queue, frame):
+    """Queue a state frame for a client, dropping its oldest pending frame if full"""
+    try:
+        queue.put_nowait(frame)
+    except asyncio.QueueFull:
+        queue.get_nowait()
+        queue.put_nowait(frame)
+
+async def client_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """Send a client's queued frames until its connection fails"""
+    try:
+        while True:
+            await send_frame(websocket, await queue.get())
+    except Exception:
+        # WebSocketDisconnect, ClientDisconnected, etc.
+        drop_connection(websocket)
+
+def drop_connection(websocket: WebSocket):
+    """Unregister a client, idling the simulation loop once none are left"""
+    active_connections.pop(websocket, None)
+    if not active_connections:
+        has_clients.clear()
+
+async def client_receiver(websocket: WebSocket):
+    """Handle a client's commands until it disconnects"""
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+        except (ValueError, KeyError):
+            # Malformed JSON or a binary message; ignore it
+            continue
+        except Exception:
+            # WebSocketDisconnect, or a receive on a closed socket
+            return
+        
+        if isinstance(message, dict) and message.get('type') == 'reset':
+            initialize_simulation()
+
+def track_frame(wire_format):
+    """Encoded one-time track message, built once per track and wire format"""
+    if wire_format not in track_frames:
+        track_frames[wire_format] = encode_frame({
+            "type": "track",
+            "data": {
+                "points": track_data['track_points'],
+                "total_length": float(track_data['total_length'])
+            }
+        }, wire_format)
+    return track_frames[wire_format]
 
 def initialize_simulation(weather=None):
     """Initialize or reset the simulation"""
     global sim, track_data
     waypoints = load_gp_track_simple()
     track_data = build_spline(waypoints, n_points=2000)
+    track_frames.clear()
     if weather is None:
         weather = {'rain': 0.15, 'track_temp': 22.0, 'wind': 3.0}
     
@@ -1493,8 +2158,10 @@ async def startup_event():
 
 async def simulation_loop():
     """Main simulation loop - runs continuously and broadcasts to all clients"""
-    global sim
+    global sim, state_frames
     while True:
+        # Sleep without waking up while nobody is watching
+        await has_clients.wait()
         if sim and len(active_connections) > 0:
             # Don't auto-reset after race finish - keep showing final results
             # Race reset will be handled manually via reset button in frontend
@@ -1505,23 +2172,19 @@ async def simulation_loop():
                 if not sim.race_finished:  # Don't step if race is finished
                     sim.step()
             
-            # Get current state
+            # Get current state, encoded once per wire format in use
             state = sim.get_state()
+            frames = {client.wire_format: encode_frame(state, client.wire_format)
+                      for client in active_connections.values()}
             
-            # Broadcast to all connected clients
-            disconnected = set()
-            for connection in active_connections.copy():  # Use copy to avoid modification during iteration
-                try:
-                    await connection.send_json(state)
-                except WebSocketDisconnect:
-                    # Client disconnected normally
-                    disconnected.add(connection)
-                except Exception:
-                    # Handle any other connection errors (ClientDisconnected, etc.)
-                    disconnected.add(connection)
-            
-            # Remove disconnected clients
-            active_connections.difference_update(disconnected)
+            # Nothing changed since the last broadcast (e.g. paused or
+            # finished): every client already has this frame
+            if frames != state_frames:
+                state_frames = frames
+                # Hand the frame to every client's sender task; a slow client
+                # skips stale frames instead of stalling the simulation
+                for client in active_connections.values():
+                    offer_frame(client.queue, frames[client.wire_format])
         
         await asyncio.sleep(0.1)  # 10 updates per second
 
@@ -1810,48 +2473,63 @@ async def get_optimal_pit_strategy():
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    active_connections.add(websocket)
+    wire_format = client_wire_format(websocket)
+    if wire_format.startswith('msgpack') and 'msgpack' in websocket.scope.get('subprotocols', []):
+        await websocket.accept(subprotocol='msgpack')
+    else:
+        await websocket.accept()
+    sender = receiver = None
     
     try:
         # Ensure simulation is initialized
         if track_data is None:
             initialize_simulation()
         
-        # Send initial track data
+        # Send initial track data (directly, so it can't be dropped from the queue)
         if track_data:
             try:
-                await websocket.send_json({
-                    "type": "track",
-                    "data": {
-                        "points": track_data['track_points'],
-                        "total_length": float(track_data['total_length'])
-                    }
-                })
+                await send_frame(websocket, track_frame(wire_format))
             except (WebSocketDisconnect, Exception):
                 # Client disconnected before we could send track data
                 return
         
-        # Keep connection alive
-        while True:
-            # Receive any messages from client (for future commands)
-            try:
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                
-                if message.get('type') == 'reset':
-                    initialize_simulation()
-                    
-            except WebSocketDisconnect:
-                break
-            except Exception:
-                pass
-            
-            await asyncio.sleep(0.1)
+        # Start receiving state broadcasts
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        active_connections[websocket] = ClientChannel(wire_format, queue)
+        has_clients.set()
+        if wire_format in state_frames:
+            # Latest state right away, even if it's unchanged and not rebroadcast
+            offer_frame(queue, state_frames[wire_format])
+        sender = asyncio.create_task(client_sender(websocket, queue))
+        
+        # Commands arrive on their own task; the connection lives until either side ends
+        receiver = asyncio.create_task(client_receiver(websocket))
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
             
     finally:
-        active_connections.discard(websocket)
+        drop_connection(websocket)
+        for task in (sender, receiver):
+            if task is not None:
+                task.cancel()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    # uvloop and httptools come with uvicorn[standard], but uvloop has no
+    # Windows build; fall back to the stock asyncio loop there
+    try:
+        import uvloop
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    
+    # No per-connection permessage-deflate: it would recompress the same frame
+    # for every client on the event loop. Clients that want compression ask
+    # for ?compress=zlib and get a frame compressed once per broadcast
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop, http=http, ws="websockets",
+                ws_per_message_deflate=False)